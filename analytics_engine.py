@@ -2,14 +2,34 @@
 """
 Analytics module for determining price trajectories
 """
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from data_storage import DataStorage
+from track_builder import TrackBuilder
+import numpy as np
 import pandas as pd
 import sqlite3
 from logger import perf_logger
+import os
 import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 
+# Snapshot columns needed to select pairs and build two-point tracks
+SNAPSHOT_TRACK_COLUMNS = ['pair', 'rank', 'price', 'change_24h', 'volume_24h']
+# Explicit dtypes for these columns (nullable Int32 so a NULL rank does not fail the read)
+SNAPSHOT_TRACK_DTYPES = {
+    'pair': 'string',
+    'rank': 'Int32',
+    'price': 'float64',
+    'change_24h': 'float64',
+    'volume_24h': 'float64',
+}
+# Rebuild mode saves accumulated tracks every N processed snapshot pairs
+TRACK_FLUSH_EVERY = 500
+# Busy timeout (seconds) of rebuild worker processes, which wait for each other's track flushes
+REBUILD_BUSY_TIMEOUT = 120.0
+
 
 class AnalyticsEngine:
     """Analysis of position change trajectories for pairs"""
@@ -22,7 +42,8 @@ class AnalyticsEngine:
 
     def build_and_save_two_point_tracks(self, exchange: str, market_type: str,
                                         rebuild_all: bool = False,
-                                        target_interval_seconds: int = None):
+                                        target_interval_seconds: int = None,
+                                        rank_threshold: int = None) -> int:
         """Building and saving tracks from snapshots
 
         Args:
@@ -30,40 +51,45 @@ class AnalyticsEngine:
             market_type: Market type
             rebuild_all: If True - iterate over snapshots in DB considering interval
             target_interval_seconds: Target interval between snapshots (in seconds)
+            rank_threshold: Minimum rank change (if None, taken from settings)
+
+        Returns:
+            Number of created tracks. Errors are logged; in rebuild mode they are re-raised,
+            since the market's tracks may already be deleted.
         """
         try:
-            from track_builder import TrackBuilder
-
             # Create tracks table if needed
             self.storage.create_tracks_table()
 
             # Create track builder
             track_builder = TrackBuilder(self.storage)
 
-            # Get threshold from settings
-            rank_threshold = self.storage.get_setting('rank_threshold', 5)
+            # Get threshold and interval from settings (one query) if not provided
+            if rank_threshold is None or target_interval_seconds is None:
+                settings_threshold, settings_interval = self._get_rebuild_settings()
+                if rank_threshold is None:
+                    rank_threshold = settings_threshold
+                if target_interval_seconds is None:
+                    target_interval_seconds = settings_interval
+                    self.logger.debug("📊 Using interval from settings: %s sec", target_interval_seconds)
 
-            # If target_interval_seconds not provided, get from settings
-            if target_interval_seconds is None:
-                target_interval_seconds = self.storage.get_setting('interval', 60)
-                # Convert string to int if needed
-                if isinstance(target_interval_seconds, str):
-                    try:
-                        target_interval_seconds = int(target_interval_seconds)
-                    except:
-                        target_interval_seconds = 60
-                self.logger.debug(f"📊 Using interval from settings: {target_interval_seconds} sec")
+            # Coerce once here so the per-pair comparison is a plain int compare
+            rank_threshold = self._to_int(rank_threshold, 5)
+            target_interval_seconds = self._to_int(target_interval_seconds, 60)
+
+            # Get manual pairs once for all snapshot pairs (frozenset for O(1) membership)
+            manual_pairs = frozenset(self.storage.get_manual_pairs())
 
             # Delete existing tracks for this exchange and market type
             if rebuild_all:
                 self._delete_tracks_for_exchange(exchange, market_type)
-                self.logger.info(f"🗑️ Deleted existing tracks for {exchange}/{market_type}")
+                self.logger.info("🗑️ Deleted existing tracks for %s/%s", exchange, market_type)
 
             # Get snapshots based on mode
             if rebuild_all:
                 # Get all snapshots for this exchange and market type
                 snapshots = self._get_all_snapshots_sorted(exchange, market_type)
-                self.logger.info(f"📊 Rebuild mode: found {len(snapshots)} snapshots")
+                self.logger.info("📊 Rebuild mode: found %d snapshots", len(snapshots))
 
                 if len(snapshots) > 0:
                     # Analyze actual interval between snapshots
@@ -71,270 +97,295 @@ class AnalyticsEngine:
             else:
                 # Get the last two snapshots
                 snapshots = self.storage.get_latest_snapshots(exchange, market_type, limit=2)
-                self.logger.debug(f"📊 Normal mode: last 2 snapshots")
+                self.logger.debug("📊 Normal mode: last 2 snapshots")
 
             if len(snapshots) < 2:
                 self.logger.warning("Not enough snapshots to build tracks")
-                return
+                return 0
 
             all_tracks = {}
             created_count = 0
-            processed_pairs = set()
 
             if rebuild_all:
                 # Process snapshots with target interval
-                self.logger.info(f"🔄 Building tracks with target interval: {target_interval_seconds} sec")
+                self.logger.info("🔄 Building tracks with target interval: %s sec", target_interval_seconds)
 
-                # Algorithm to skip snapshots to approximate target interval
-                i = 0
-                skipped_count = 0
+                # Plan snapshot pairs approximating the target interval, then process them
+                plan = self._plan_snapshot_pairs(snapshots, target_interval_seconds)
+                skipped_count = len(snapshots)
                 used_count = 0
 
-                while i < len(snapshots):
-                    # Find the next snapshot closest to target interval
-                    current_table, current_time, _ = snapshots[i]
-                    best_match_index = -1
-                    best_match_diff = float('inf')
-
-                    # Look ahead for snapshots close to target interval
-                    for j in range(i + 1, min(i + 20, len(snapshots))):  # Check at most 20 next snapshots
-                        next_table, next_time, _ = snapshots[j]
-                        time_diff = (next_time - current_time).total_seconds()
-                        diff_from_target = abs(time_diff - target_interval_seconds)
-
-                        # Allow 30 seconds tolerance
-                        if diff_from_target <= 30:
-                            best_match_index = j
-                            best_match_diff = diff_from_target
-                            break
-                        elif diff_from_target < best_match_diff:
-                            best_match_index = j
-                            best_match_diff = diff_from_target
-
-                    if best_match_index != -1:
-                        # Found a suitable snapshot
-                        prev_table, prev_time, _ = snapshots[i]
-                        new_table, new_time, _ = snapshots[best_match_index]
+                # Snapshot DataFrames loading in the background, keyed by table name
+                snapshot_futures = {}
+
+                with ThreadPoolExecutor(max_workers=1) as prefetch_pool:
+                    def prefetch(table_name):
+                        if table_name not in snapshot_futures:
+                            snapshot_futures[table_name] = prefetch_pool.submit(self._load_snapshot_df, table_name)
+                        return snapshot_futures[table_name]
+
+                    for step, (prev_idx, new_idx) in enumerate(plan):
+                        prev_table, prev_time, _ = snapshots[prev_idx]
+                        new_table, new_time, _ = snapshots[new_idx]
+                        prev_future = prefetch(prev_table)
+                        new_future = prefetch(new_table)
+
+                        # Read the next pair's new snapshot while this pair is processed
+                        next_table = snapshots[plan[step + 1][1]][0] if step + 1 < len(plan) else None
+                        if next_table:
+                            prefetch(next_table)
+
+                        # Evict snapshots older than one step to bound memory
+                        for table_name in list(snapshot_futures):
+                            if table_name not in (new_table, next_table):
+                                del snapshot_futures[table_name]
+
                         actual_interval = (new_time - prev_time).total_seconds()
 
                         if abs(actual_interval - target_interval_seconds) <= 30:
                             self.logger.debug(
-                                f"✅ Perfect interval: {actual_interval:.0f} sec between {prev_table} and {new_table}")
+                                "✅ Perfect interval: %.0f sec between %s and %s",
+                                actual_interval, prev_table, new_table)
                         else:
                             self.logger.info(
-                                f"⚠ Approximate interval: {actual_interval:.0f} sec (target: {target_interval_seconds} sec)")
+                                "⚠ Approximate interval: %.0f sec (target: %s sec)",
+                                actual_interval, target_interval_seconds)
 
                         created_in_pair = self._process_snapshot_pair(
-                            track_builder, prev_table, prev_time, new_table, new_time,
-                            exchange, market_type, rank_threshold, all_tracks, processed_pairs
+                            track_builder, prev_table, prev_future.result(), prev_time,
+                            new_table, new_future.result(), new_time,
+                            exchange, market_type, rank_threshold, manual_pairs, all_tracks
                         )
                         created_count += created_in_pair
                         used_count += 1
 
-                        # Move to the snapshot after new_table
-                        i = best_match_index
-                    else:
-                        # No suitable snapshot, take the next one in order
-                        if i + 1 < len(snapshots):
-                            prev_table, prev_time, _ = snapshots[i]
-                            new_table, new_time, _ = snapshots[i + 1]
-                            actual_interval = (new_time - prev_time).total_seconds()
-
-                            if actual_interval > target_interval_seconds * 2:
-                                self.logger.warning(
-                                    f"⚠ Large interval: {actual_interval:.0f} sec ({actual_interval / target_interval_seconds:.1f} times target)")
-
-                            created_in_pair = self._process_snapshot_pair(
-                                track_builder, prev_table, prev_time, new_table, new_time,
-                                exchange, market_type, rank_threshold, all_tracks, processed_pairs
-                            )
-                            created_count += created_in_pair
-                            used_count += 1
-                            i += 1
-                        else:
-                            break
+                        # Flush accumulated tracks to keep memory bounded on long rebuilds
+                        if all_tracks and used_count % TRACK_FLUSH_EVERY == 0:
+                            track_builder.save_tracks_to_db(all_tracks, exchange, market_type)
+                            all_tracks.clear()
 
-                    # Count skipped snapshots
-                    skipped_count = len(snapshots) - used_count
+                        # Count skipped snapshots
+                        skipped_count = len(snapshots) - used_count
 
-                    # Log progress
-                    if used_count % 10 == 0:
-                        self.logger.info(f"⏳ Processed {used_count} snapshot pairs, skipped {skipped_count}")
+                        # Log progress
+                        if used_count % 100 == 0:
+                            self.logger.info("⏳ Processed %d snapshot pairs, skipped %d", used_count, skipped_count)
 
                 self.logger.info(
-                    f"📊 Total: used {used_count} snapshot pairs out of {len(snapshots)}, skipped {skipped_count}")
+                    "📊 Total: used %d snapshot pairs out of %d, skipped %d",
+                    used_count, len(snapshots), skipped_count)
             else:
                 # Process only last 2 snapshots
                 new_table, new_time, _ = snapshots[0]
                 prev_table, prev_time, _ = snapshots[1]
 
                 created_in_pair = self._process_snapshot_pair(
-                    track_builder, prev_table, prev_time, new_table, new_time,
-                    exchange, market_type, rank_threshold, all_tracks, processed_pairs
+                    track_builder, prev_table, self._load_snapshot_df(prev_table), prev_time,
+                    new_table, self._load_snapshot_df(new_table), new_time,
+                    exchange, market_type, rank_threshold, manual_pairs, all_tracks
                 )
                 created_count += created_in_pair
 
-            # Save tracks to DB
+            # Save tracks to DB (remainder after incremental flushes in rebuild mode)
             if all_tracks:
                 track_builder.save_tracks_to_db(all_tracks, exchange, market_type)
+
+            if created_count:
                 mode_text = "rebuilt" if rebuild_all else "created"
                 interval_text = f"with interval ~{target_interval_seconds} sec" if rebuild_all else ""
-                self.logger.debug(f"✅ {mode_text} {created_count} tracks for {len(all_tracks)} pairs {interval_text}")
+                self.logger.debug("✅ %s %d tracks %s", mode_text, created_count, interval_text)
             else:
                 self.logger.info("⚠️ No tracks to save")
 
+            return created_count
+
         except Exception as e:
-            self.logger.error(f"❌ Error building tracks: {e}")
-            import traceback
-            self.logger.error(f"Traceback: {traceback.format_exc()}")
+            self.logger.error("❌ Error building tracks: %s", e)
+            self.logger.error("Traceback: %s", traceback.format_exc())
+            if rebuild_all:
+                raise
+            return 0
 
-    def _process_snapshot_pair(self, track_builder, prev_table, prev_time, new_table, new_time,
-                               exchange, market_type, rank_threshold, all_tracks, processed_pairs):
-        """Process a snapshot pair"""
-        created_in_pair = 0
+    @staticmethod
+    def _plan_snapshot_pairs(snapshots, target_interval_seconds: int) -> List[Tuple[int, int]]:
+        """Plan (prev_index, new_index) snapshot pairs approximating the target interval
 
-        # Load snapshot data
-        new_df = self.storage.get_snapshot_data(new_table)
-        prev_df = self.storage.get_snapshot_data(prev_table)
+        Greedy: from the current snapshot jump to the later snapshot whose time is
+        closest to current time + target interval (binary search over sorted times).
+        """
+        times_arr = np.array([s[1].timestamp() for s in snapshots], dtype=np.float64)
+        count = len(times_arr)
+        plan = []
+
+        i = 0
+        while i < count - 1:
+            target_time = times_arr[i] + target_interval_seconds
+            j = int(np.searchsorted(times_arr, target_time))
+
+            # The closest snapshot is on one side of the insertion point (strictly after i)
+            candidates = [c for c in (j - 1, j) if i < c < count]
+            if not candidates:
+                # No suitable snapshot, take the next one in order
+                candidates = [i + 1]
+            best_match_index = min(candidates, key=lambda c: abs(times_arr[c] - target_time))
+
+            plan.append((i, best_match_index))
+            i = best_match_index
+
+        return plan
+
+    def _load_snapshot_df(self, table_name: str) -> pd.DataFrame:
+        """Load the snapshot columns needed for track building"""
+        return self.storage.get_snapshot_data(table_name, SNAPSHOT_TRACK_COLUMNS, SNAPSHOT_TRACK_DTYPES)
+
+    def _process_snapshot_pair(self, track_builder, prev_table, prev_df, prev_time, new_table, new_df, new_time,
+                               exchange, market_type, rank_threshold, manual_pairs, all_tracks):
+        """Process a snapshot pair from already loaded snapshot DataFrames"""
+        created_in_pair = 0
 
         if new_df.empty or prev_df.empty:
             return 0
 
-        # Get manual pairs
-        manual_pairs = self.storage.get_manual_pairs()
-
-        # Find common pairs in both snapshots
-        common_pairs = set(new_df['pair']).intersection(set(prev_df['pair']))
-
-        for pair in common_pairs:
-            # Skip if already processed (for rebuild_all)
-            pair_key = f"{pair}_{prev_time}_{new_time}"
-            if pair_key in processed_pairs:
-                continue
-
-            try:
-                # Get ranks
-                new_rank = new_df[new_df['pair'] == pair]['rank'].iloc[0]
-                prev_rank = prev_df[prev_df['pair'] == pair]['rank'].iloc[0]
-
-                # Calculate difference
-                rank_diff = abs(int(new_rank) - int(prev_rank))
-
-                # Check conditions
-                is_manual = pair in manual_pairs
-                if is_manual or rank_diff >= rank_threshold:
-                    # Get color
-                    color_id, color_hex = self.storage.get_or_create_pair_color(pair)
-
-                    # Create track
-                    track = track_builder._create_track_from_two_points(
-                        pair, prev_df, prev_time, new_df, new_time,
-                        color_hex if color_hex else "#FF0000",
-                        is_manual
-                    )
+        try:
+            # Validate ranks once for the whole snapshot instead of per pair
+            new_ranks = self._get_valid_ranks(new_df)
+            prev_ranks = self._get_valid_ranks(prev_df)
+
+            # Join common pairs of both snapshots and select candidates in one vectorized pass
+            merged = new_ranks.merge(prev_ranks, on='pair', suffixes=('_new', '_prev'))
+            rank_diff = (merged['rank_new'] - merged['rank_prev']).abs()
+            manual_mask = merged['pair'].isin(manual_pairs)
+            mask = manual_mask | (rank_diff >= rank_threshold)
+
+            candidate_pairs = merged.loc[mask, 'pair'].to_numpy()
+            candidate_manual = manual_mask[mask].to_numpy()
+
+            # Load (or create) colors for all candidates in one batch
+            color_map = self.storage.preload_pair_colors(candidate_pairs.tolist())
+
+            # Each (prev_table, new_table) is visited once, so a pair cannot get a duplicate track here
+            for pair, is_manual in zip(candidate_pairs, candidate_manual):
+                # Get color
+                color_id, color_hex = color_map.get(pair, (None, None))
+
+                # Create track
+                track = track_builder._create_track_from_two_points(
+                    pair, prev_df, prev_time, new_df, new_time,
+                    color_hex if color_hex else "#FF0000",
+                    bool(is_manual)
+                )
 
-                    if track:
-                        if pair not in all_tracks:
-                            all_tracks[pair] = []
-                        all_tracks[pair].append(track)
-                        created_in_pair += 1
-                        processed_pairs.add(pair_key)
+                if track:
+                    if pair not in all_tracks:
+                        all_tracks[pair] = []
+                    all_tracks[pair].append(track)
+                    created_in_pair += 1
 
-            except Exception as e:
-                self.logger.warning(f"Error creating track for {pair}: {e}")
+        except Exception as e:
+            self.logger.warning("Error processing snapshots %s -> %s: %s", prev_table, new_table, e)
 
         return created_in_pair
 
+    @staticmethod
+    def _get_valid_ranks(df: pd.DataFrame) -> pd.DataFrame:
+        """Get pair/rank columns with ranks cast to int32, rows with invalid rank dropped"""
+        ranks = pd.DataFrame({
+            'pair': df['pair'],
+            'rank': pd.to_numeric(df['rank'], errors='coerce')
+        })
+        ranks = ranks.dropna(subset=['rank'])
+        ranks['rank'] = ranks['rank'].astype('int32')
+        return ranks
+
     def _get_all_snapshots_sorted(self, exchange: str, market_type: str):
         """Get all snapshots for exchange and market type, sorted by time"""
-        conn = sqlite3.connect(self.storage.db_path)
-        cursor = conn.cursor()
-
         try:
-            cursor.execute('''
-                SELECT table_name, exchange_timestamp, created_at 
-                FROM snapshots_meta 
-                WHERE exchange = ? AND market_type = ?
-                ORDER BY exchange_timestamp ASC
-            ''', (exchange, market_type))
-
-            results = cursor.fetchall()
-
-            if not results:
+            with self.storage.conn_lock:
+                df = pd.read_sql_query('''
+                    SELECT table_name, exchange_timestamp, created_at 
+                    FROM snapshots_meta 
+                    WHERE exchange = ? AND market_type = ?
+                    ORDER BY exchange_timestamp ASC
+                ''', self.storage.get_conn(), params=(exchange, market_type))
+
+            if df.empty:
                 return []
 
-            # Convert time strings to datetime
-            snapshots = []
-            for table_name, exchange_time_str, created_str in results:
-                try:
-                    exchange_time = datetime.fromisoformat(exchange_time_str.replace('Z', '+00:00'))
-                except:
-                    # If cannot parse as ISO, use created_at as fallback
-                    exchange_time = datetime.fromisoformat(created_str)
-
-                created_at = datetime.fromisoformat(created_str)
-                snapshots.append((table_name, exchange_time, created_at))
+            # Convert time strings to datetime for the whole column at once
+            created_at = pd.to_datetime(df['created_at'], utc=True, format='ISO8601')
+            exchange_time = pd.to_datetime(df['exchange_timestamp'], utc=True, format='ISO8601',
+                                           errors='coerce')
+            # If cannot parse as ISO, use created_at as fallback
+            exchange_time = exchange_time.fillna(created_at)
 
-            return snapshots
+            return list(zip(df['table_name'], exchange_time, created_at))
 
-        except sqlite3.OperationalError as e:
+        except (sqlite3.OperationalError, pd.errors.DatabaseError) as e:
             if "no such table" in str(e):
                 self.logger.warning("⚠ Table snapshots_meta does not exist")
                 return []
             raise
-        finally:
-            conn.close()
 
     def _analyze_snapshot_intervals(self, snapshots):
         """Analyze intervals between snapshots"""
         if len(snapshots) < 2:
             return
 
-        intervals = []
-        for i in range(len(snapshots) - 1):
-            _, time1, _ = snapshots[i]
-            _, time2, _ = snapshots[i + 1]
-            interval = (time2 - time1).total_seconds()
-            intervals.append(interval)
+        times = pd.to_datetime([s[1] for s in snapshots], utc=True).tz_localize(None).to_numpy()
+        intervals = np.diff(times) / np.timedelta64(1, 's')
 
-        if intervals:
-            min_interval = min(intervals)
-            max_interval = max(intervals)
-            avg_interval = sum(intervals) / len(intervals)
+        if intervals.size:
+            min_interval = intervals.min()
+            max_interval = intervals.max()
+            avg_interval = intervals.mean()
 
             self.logger.info(
-                f"📊 Interval statistics: min={min_interval:.0f}s, max={max_interval:.0f}s, avg={avg_interval:.0f}s")
+                "📊 Interval statistics: min=%.0fs, max=%.0fs, avg=%.0fs",
+                min_interval, max_interval, avg_interval)
 
             # Group intervals
-            from collections import Counter
-            interval_counts = Counter(intervals)
-            most_common = interval_counts.most_common(3)
+            unique_intervals, counts = np.unique(intervals, return_counts=True)
+            most_common = np.argsort(-counts, kind='stable')[:3]
 
-            self.logger.info(f"📊 Most frequent intervals:")
-            for interval, count in most_common:
-                self.logger.info(f"  - {interval:.0f}s: {count} times ({count / len(intervals) * 100:.1f}%)")
+            self.logger.info("📊 Most frequent intervals:")
+            for idx in most_common:
+                interval, count = unique_intervals[idx], counts[idx]
+                self.logger.info("  - %.0fs: %d times (%.1f%%)", interval, count, count / intervals.size * 100)
 
     def _delete_tracks_for_exchange(self, exchange: str, market_type: str):
         """Delete all tracks for specified exchange and market type"""
-        conn = sqlite3.connect(self.storage.db_path)
-        cursor = conn.cursor()
+        with self.storage.pooled_connection() as conn:
+            cursor = conn.cursor()
 
-        try:
-            cursor.execute('''
-                DELETE FROM tracks 
-                WHERE exchange = ? AND market_type = ?
-            ''', (exchange, market_type))
+            try:
+                cursor.execute('''
+                    DELETE FROM tracks 
+                    WHERE exchange = ? AND market_type = ?
+                ''', (exchange, market_type))
 
-            deleted_count = cursor.rowcount
-            conn.commit()
+                deleted_count = cursor.rowcount
+                conn.commit()
 
-            self.logger.info(f"🗑️ Deleted {deleted_count} tracks for {exchange}/{market_type}")
+                self.logger.info(f"🗑️ Deleted {deleted_count} tracks for {exchange}/{market_type}")
 
-        except Exception as e:
-            self.logger.error(f"❌ Error deleting tracks: {e}")
-            conn.rollback()
-        finally:
-            conn.close()
+            except Exception as e:
+                self.logger.error(f"❌ Error deleting tracks: {e}")
+                conn.rollback()
+
+    def _get_rebuild_settings(self):
+        """Get rank threshold and snapshot interval (seconds) with a single settings query"""
+        settings = self.storage.get_settings(['rank_threshold', 'interval'])
+        rank_threshold = self._to_int(settings.get('rank_threshold', 5), 5)
+        interval_seconds = self._to_int(settings.get('interval', 60), 60)
+        return rank_threshold, interval_seconds
+
+    @staticmethod
+    def _to_int(value, default: int) -> int:
+        """Convert setting value (possibly a string) to int, default if not possible"""
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return default
 
     def rebuild_all_tracks(self, exchange: str, markets: List[str], interval_seconds: int = None):
         """Rebuild all tracks for specified markets considering interval
@@ -343,42 +394,79 @@ class AnalyticsEngine:
             exchange: Exchange name
             markets: List of market types
             interval_seconds: Target interval between snapshots (if None, taken from settings)
+
+        Returns:
+            Total number of created tracks
+
+        Raises:
+            RuntimeError: If the rebuild failed for any market (the others are still rebuilt)
         """
         self.logger.info(f"🔄 Started rebuilding all tracks for {exchange}")
 
         total_created = 0
+        failed_markets = []
 
-        for market_type in markets:
-            self.logger.info(f"🔄 Rebuilding tracks for market: {market_type}")
+        # Read settings once for all markets
+        rank_threshold, settings_interval = self._get_rebuild_settings()
+        if interval_seconds is None:
+            interval_seconds = settings_interval
 
-            try:
-                # Get current threshold for logging
-                rank_threshold = self.storage.get_setting('rank_threshold', 5)
-                self.logger.info(f"📊 Using sensitivity threshold: {rank_threshold}")
-
-                # Get interval from settings if not provided
-                if interval_seconds is None:
-                    interval_setting = self.storage.get_setting('interval', 60)
-                    if isinstance(interval_setting, str):
-                        try:
-                            interval_seconds = int(interval_setting)
-                        except:
-                            interval_seconds = 60
-                    else:
-                        interval_seconds = interval_setting
-
-                self.logger.info(f"📊 Target interval between snapshots: {interval_seconds} sec")
-
-                # Build tracks with rebuild_all=True and specified interval
-                self.build_and_save_two_point_tracks(
-                    exchange, market_type,
-                    rebuild_all=True,
-                    target_interval_seconds=interval_seconds
-                )
+        self.logger.info(f"📊 Using sensitivity threshold: {rank_threshold}")
+        self.logger.info(f"📊 Target interval between snapshots: {interval_seconds} sec")
 
-            except Exception as e:
-                self.logger.error(f"❌ Error rebuilding tracks for {market_type}: {e}")
-                import traceback
-                self.logger.error(f"Traceback: {traceback.format_exc()}")
+        if len(markets) <= 1:
+            for market_type in markets:
+                self.logger.info(f"🔄 Rebuilding tracks for market: {market_type}")
 
-        self.logger.info(f"✅ Completed rebuilding all tracks for {exchange}")
\ No newline at end of file
+                try:
+                    # Build tracks with rebuild_all=True and specified interval
+                    total_created += self.build_and_save_two_point_tracks(
+                        exchange, market_type,
+                        rebuild_all=True,
+                        target_interval_seconds=interval_seconds,
+                        rank_threshold=rank_threshold
+                    )
+
+                except Exception as e:
+                    self.logger.error(f"❌ Error rebuilding tracks for {market_type}: {e}")
+                    failed_markets.append(market_type)
+        else:
+            # Markets are rebuilt in parallel worker processes. Their tracks are disjoint (market_type rows),
+            # but SQLite allows one writer at a time: track deletes/flushes and the shared pair_colors inserts
+            # queue on the write lock, so workers use a long busy timeout instead of the default 5 s
+            max_workers = min(len(markets), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(_rebuild_market_tracks, self.storage.db_path, exchange,
+                                    market_type, interval_seconds, rank_threshold): market_type
+                    for market_type in markets
+                }
+                for future in as_completed(futures):
+                    market_type = futures[future]
+                    try:
+                        created = future.result()
+                        total_created += created
+                        self.logger.info(f"✅ Rebuilt tracks for market: {market_type} ({created} tracks)")
+                    except Exception as e:
+                        self.logger.error(f"❌ Error rebuilding tracks for {market_type}: {e}")
+                        failed_markets.append(market_type)
+
+        if failed_markets:
+            self.logger.error(f"❌ Rebuilding tracks for {exchange} failed for markets: {', '.join(failed_markets)}")
+            raise RuntimeError(f"Track rebuild failed for markets: {', '.join(failed_markets)}")
+
+        self.logger.info(f"✅ Completed rebuilding all tracks for {exchange}: {total_created} tracks")
+        return total_created
+
+
+def _rebuild_market_tracks(db_path: str, exchange: str, market_type: str,
+                           interval_seconds: int, rank_threshold: int) -> int:
+    """Rebuild tracks for one market in a worker process (module level so it can be pickled)"""
+    engine = AnalyticsEngine(DataStorage(db_path, busy_timeout=REBUILD_BUSY_TIMEOUT))
+    engine.logger.info(f"🔄 Rebuilding tracks for market: {market_type}")
+    return engine.build_and_save_two_point_tracks(
+        exchange, market_type,
+        rebuild_all=True,
+        target_interval_seconds=interval_seconds,
+        rank_threshold=rank_threshold
+    )
\ No newline at end of file
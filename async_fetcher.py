@@ -3,41 +3,69 @@
 Asynchronous data fetcher from crypto exchanges
 """
 import asyncio
+import json
+import os
 import sys
-from typing import Optional
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 import ccxt.async_support as ccxt
 from datetime import datetime, timezone
-from universal_resolver import create_aiohttp_session
+from universal_resolver import create_aiohttp_session, get_request_semaphore
 from logger import perf_logger
 
-# Windows specific setup
+# On-disk cache of loaded markets, reused on warm start while younger than max age
+MARKETS_CACHE_DIR = ".cache"
+MARKETS_CACHE_MAX_AGE = 24 * 3600
+
+# ccxt market type for futures by exchange (others use 'future')
+_FUTURES_TYPE_MAP = {
+    'binance': 'future',
+    'kucoin': 'future',
+    'mexc': 'swap',
+    'okx': 'swap',
+    'bybit': 'linear',
+}
+
+# Event loop setup: prefer libuv-based loops, fall back to the selector loop on Windows
 if sys.platform.startswith('win'):
-    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    try:
+        import winloop
+        winloop.install()
+    except ModuleNotFoundError:
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+else:
+    try:
+        import uvloop
+        uvloop.install()
+    except ModuleNotFoundError:
+        pass
 
 
 class AsyncExchangeFetcher:
     """Data fetcher from exchanges with ranking by daily growth"""
 
-    def __init__(self, exchange_id: str, market_type: str = 'spot'):
+    # Tickers shared by fetchers of the same exchange/market: (exchange_id, ccxt_market_type) -> (fetched_at, tickers)
+    _tickers_cache: Dict[Tuple[str, str], Tuple[float, dict]] = {}
+    # One refresh lock per cache key, shared by those fetchers: key -> (event loop, lock)
+    _tickers_locks: Dict[Tuple[str, str], Tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = {}
+
+    def __init__(self, exchange_id: str, market_type: str = 'spot', tickers_ttl: float = 30.0):
         self.exchange_id = exchange_id.lower()
         self.market_type = market_type.lower()
 
         # Determine ccxt_market_type
         if self.market_type == 'futures':
-            if self.exchange_id in ['binance', 'kucoin']:
-                self.ccxt_market_type = 'future'
-            elif self.exchange_id in ['mexc', 'okx']:
-                self.ccxt_market_type = 'swap'
-            elif self.exchange_id in ['bybit']:
-                self.ccxt_market_type = 'linear'
-            else:
-                self.ccxt_market_type = 'future'
+            self.ccxt_market_type = _FUTURES_TYPE_MAP.get(self.exchange_id, 'future')
         else:
             self.ccxt_market_type = self.market_type
 
         self.exchange = None
         self.session = None
+        self._symbol_type_map: Dict[str, str] = {}
+        self._symbol_quote_map: Dict[str, str] = {}
+        self._tickers_ttl = tickers_ttl
         self.logger = perf_logger.get_logger('async_fetcher', 'fetcher')
 
     async def __aenter__(self):
@@ -70,14 +98,22 @@ class AsyncExchangeFetcher:
                 # Create instance
                 self.exchange = exchange_class(config)
 
-                # Load markets
-                await self.exchange.load_markets()
+                # Load markets (from disk cache when fresh)
+                cached_markets = self._load_cached_markets()
+                if cached_markets:
+                    self.exchange.set_markets(cached_markets)
+                    self.logger.debug(f"📦 Markets for {self.exchange_id} loaded from cache")
+                else:
+                    await self.exchange.load_markets()
+                    self._save_cached_markets()
+
+                # Normalized market type and quote currency per symbol, used for ticker filtering
+                self._symbol_type_map = {s: (m.get('type') or '').lower() for s, m in self.exchange.markets.items()}
+                self._symbol_quote_map = {s: (m.get('quote') or '').upper() for s, m in self.exchange.markets.items()}
 
                 # Log information about loaded pairs
-                filtered_pairs = []
-                for symbol, market in self.exchange.markets.items():
-                    if market.get('type', '').lower() == self.ccxt_market_type:
-                        filtered_pairs.append(symbol)
+                filtered_pairs = [symbol for symbol, market_type in self._symbol_type_map.items()
+                                  if market_type == self.ccxt_market_type]
 
                 self.logger.info(f"✅ {self.exchange_id} ({self.ccxt_market_type}) ready. Pairs: {len(filtered_pairs)}")
                 if filtered_pairs:
@@ -89,6 +125,35 @@ class AsyncExchangeFetcher:
 
         return self.exchange
 
+    def _markets_cache_path(self) -> str:
+        """Markets cache file, versioned by ccxt version"""
+        file_name = f"markets_{self.exchange_id}_{self.market_type}_{ccxt.__version__}.json"
+        return os.path.join(MARKETS_CACHE_DIR, file_name)
+
+    def _load_cached_markets(self) -> Optional[dict]:
+        """Load markets from disk cache if it is younger than MARKETS_CACHE_MAX_AGE"""
+        cache_path = self._markets_cache_path()
+        try:
+            if time.time() - os.path.getmtime(cache_path) < MARKETS_CACHE_MAX_AGE:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _save_cached_markets(self):
+        """Save loaded markets to disk cache"""
+        cache_path = self._markets_cache_path()
+        try:
+            os.makedirs(MARKETS_CACHE_DIR, exist_ok=True)
+            # Write to a temporary file first so readers never see a partial cache
+            temp_path = f"{cache_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.exchange.markets, f, default=str)
+            os.replace(temp_path, cache_path)
+        except (OSError, TypeError, ValueError) as e:
+            self.logger.warning(f"⚠ Could not save markets cache for {self.exchange_id}: {e}")
+
     def _get_exchange_timestamp(self, ticker: dict) -> str:
         """
         Get exchange timestamp from ticker.
@@ -132,6 +197,47 @@ class AsyncExchangeFetcher:
         # 4. Fallback: return system time with a note
         return datetime.now(tz=timezone.utc).isoformat()
 
+    @classmethod
+    def _get_tickers_lock(cls, cache_key: Tuple[str, str]) -> asyncio.Lock:
+        """Shared lock for a tickers cache key (recreated when the event loop changes, e.g. collector restart)"""
+        loop = asyncio.get_running_loop()
+        entry = cls._tickers_locks.get(cache_key)
+        if entry is None or entry[0] is not loop:
+            entry = (loop, asyncio.Lock())
+            cls._tickers_locks[cache_key] = entry
+        return entry[1]
+
+    async def _fetch_tickers_cached(self) -> dict:
+        """Get tickers, reusing the last response while it is younger than the TTL"""
+        cache_key = (self.exchange_id, self.ccxt_market_type)
+
+        # Lock so that concurrent callers with a stale cache refresh it only once, across all fetchers
+        async with self._get_tickers_lock(cache_key):
+            cached = self._tickers_cache.get(cache_key)
+            if cached and time.monotonic() - cached[0] < self._tickers_ttl:
+                self.logger.debug(f"📦 Using cached tickers for {self.exchange_id} ({self.ccxt_market_type})")
+                return cached[1]
+
+            all_tickers = await self._fetch_tickers_for_market_type()
+            self._tickers_cache[cache_key] = (time.monotonic(), all_tickers)
+            return all_tickers
+
+    async def _fetch_tickers_for_market_type(self) -> dict:
+        """Fetch tickers of the configured market type only, filtered on the exchange side"""
+        # Bybit expresses linear futures as swap + subType
+        if self.ccxt_market_type == 'linear':
+            params = {'type': 'swap', 'subType': 'linear'}
+        else:
+            params = {'type': self.ccxt_market_type}
+
+        async with get_request_semaphore():
+            try:
+                return await self.exchange.fetch_tickers(params=params)
+            except ccxt.BaseError as e:
+                # Client-side market type filtering in fetch_ranked_pairs still applies
+                self.logger.warning(f"⚠ Market type tickers request failed for {self.exchange_id}, fetching all: {e}")
+                return await self.exchange.fetch_tickers()
+
     async def fetch_ranked_pairs(self, limit: int = 50, quote_currency: Optional[str] = None) -> pd.DataFrame:
         """
         Fetch and rank pairs by daily growth with filtering by quote currency
@@ -155,7 +261,10 @@ class AsyncExchangeFetcher:
 
         try:
             # Get all tickers of the required market type
-            all_tickers = await self.exchange.fetch_tickers()
+            all_tickers = await self._fetch_tickers_cached()
+
+            # System time of the fetch, shared by all rows of the snapshot (for debugging)
+            system_timestamp = datetime.now(tz=timezone.utc).isoformat()
 
             # Get current exchange time for comparison
             current_exchange_time = None
@@ -171,95 +280,72 @@ class AsyncExchangeFetcher:
                 current_exchange_time = datetime.now(tz=timezone.utc)
                 self.logger.warning("⚠ Using system time for data freshness check")
 
-            data = []
-            inactive_pairs = []
-
-            for symbol, ticker in all_tickers.items():
-                # Filter by market type
-                market = self.exchange.markets.get(symbol, {})
-
-                # Use ccxt_market_type for filtering (need to add this attribute)
-                if market.get('type', '').lower() != getattr(self, 'ccxt_market_type', self.market_type):
-                    continue
-
-                # Filter by quote currency if specified
-                if quote_currency and quote_currency != "All pairs":
-                    # Get quote currency from market
-                    market_quote = market.get('quote', '')
-
-                    # If quote currency does not match filter - skip
-                    if not market_quote or market_quote.upper() != quote_currency.upper():
-                        continue
-
-                # Check for required data
-                if not ticker or ticker.get('last') is None or ticker.get('percentage') is None:
-                    continue
-
-                # Check that price is non-zero
-                if ticker['last'] <= 0:
-                    continue
-
-                # Check volume (optional)
-                volume = ticker.get('quoteVolume', 0)
-                if volume and volume <= 0:
-                    continue
-
-                # Get exchange time for this ticker
-                ticker_datetime = None
-
-                try:
-                    # 1. Try to get timestamp (milliseconds)
-                    if 'timestamp' in ticker and ticker['timestamp']:
-                        ticker_datetime = datetime.fromtimestamp(ticker['timestamp'] / 1000, tz=timezone.utc)
-
-                    # 2. Try to get datetime string
-                    elif 'datetime' in ticker and ticker['datetime']:
-                        if isinstance(ticker['datetime'], str):
-                            try:
-                                dt_str = ticker['datetime'].replace('Z', '+00:00')
-                                ticker_datetime = datetime.fromisoformat(dt_str)
-                            except ValueError:
-                                pass
-                except Exception as e:
-                    self.logger.warning(f"⚠ Could not get ticker time for {symbol}: {e}")
-
-                # DATA FRESHNESS CHECK
-                if ticker_datetime:
-                    # Calculate time difference between current exchange time and ticker time
-                    time_difference = current_exchange_time - ticker_datetime
-
-                    # If data is older than 24 hours, skip this pair
-                    if time_difference.total_seconds() > 24 * 3600:  # 24 hours in seconds
-                        inactive_pairs.append((symbol, ticker_datetime.isoformat()))
-                        continue  # Skip inactive pair
-                else:
-                    # If ticker time could not be obtained, consider pair inactive and skip
-                    self.logger.warning(f"⚠ Could not get time for pair {symbol}, skipping")
-                    continue
-
-                # If ticker time obtained, format it
-                exchange_timestamp = ticker_datetime.isoformat() if ticker_datetime else datetime.now(
-                    tz=timezone.utc).isoformat()
-
-                data.append({
-                    'pair': symbol,
-                    'price': ticker['last'],
-                    'change_24h': ticker.get('percentage', 0),
-                    'volume_24h': ticker.get('quoteVolume', 0),
-                    'timestamp': exchange_timestamp,  # Exchange time
-                    'system_timestamp': datetime.now(tz=timezone.utc).isoformat()  # System time for debugging
-                })
-
-            # Log information about inactive pairs
-            if inactive_pairs:
-                self.logger.info(f"⚠ Filtered out {len(inactive_pairs)} inactive pairs (data older than 24 hours):")
-                for pair, timestamp in inactive_pairs[:10]:  # Show first 10
-                    self.logger.debug(f"   - {pair}: last update {timestamp}")
-                if len(inactive_pairs) > 10:
-                    self.logger.debug(f"   ... and {len(inactive_pairs) - 10} more pairs")
-
-            # Create DataFrame and sort
-            df = pd.DataFrame(data)
+            # Load all tickers into one frame (symbol index) and filter with vectorized masks
+            tickers = {symbol: ticker for symbol, ticker in all_tickers.items() if ticker}
+            df = pd.DataFrame.from_records(
+                list(tickers.values()), index=list(tickers.keys()),
+                columns=['last', 'percentage', 'quoteVolume', 'timestamp', 'datetime']
+            )
+            df['last'] = pd.to_numeric(df['last'], errors='coerce')
+            df['percentage'] = pd.to_numeric(df['percentage'], errors='coerce')
+            df['quoteVolume'] = pd.to_numeric(df['quoteVolume'], errors='coerce')
+
+            # Filter by market type
+            symbols = df.index.to_series()
+            mask = symbols.map(self._symbol_type_map) == self.ccxt_market_type
+
+            # Filter by quote currency if specified
+            if quote_currency and quote_currency != "All pairs":
+                quote_filter = quote_currency.upper()
+                mask &= symbols.map(self._symbol_quote_map) == quote_filter
+
+            # Check for required data, non-zero price and non-negative volume
+            mask &= df['last'].notna() & df['percentage'].notna() & (df['last'] > 0)
+            mask &= ~(df['quoteVolume'] < 0)
+            df = df[mask]
+
+            # Get exchange time for each ticker: timestamp (milliseconds) first, then datetime string
+            timestamp_ms = pd.to_numeric(df['timestamp'], errors='coerce')
+            timestamp_ms = timestamp_ms.where(timestamp_ms != 0)
+            ticker_time = pd.to_datetime(timestamp_ms.fillna(0).astype('int64'), unit='ms', utc=True, errors='coerce')
+            ticker_time = ticker_time.where(timestamp_ms.notna())
+
+            # Parse datetime strings only for tickers without a timestamp
+            fallback = ticker_time.isna() & df['datetime'].notna()
+            if fallback.any():
+                ticker_time[fallback] = pd.to_datetime(df.loc[fallback, 'datetime'], utc=True,
+                                                       errors='coerce', format='ISO8601')
+
+            # If ticker time could not be obtained, consider pair inactive and skip
+            missing_time = ticker_time.isna()
+            if missing_time.any():
+                self.logger.warning(f"⚠ Could not get time for {int(missing_time.sum())} pairs, skipping")
+
+            # DATA FRESHNESS CHECK: skip pairs with data older than 24 hours
+            stale = (pd.Timestamp(current_exchange_time) - ticker_time) > pd.Timedelta(hours=24)
+            inactive_count = int(stale.sum())
+
+            # Log information about inactive pairs (only a sample is formatted)
+            if inactive_count:
+                self.logger.info(f"⚠ Filtered out {inactive_count} inactive pairs (data older than 24 hours):")
+                for pair, timestamp in ticker_time[stale].head(10).items():  # Show first 10
+                    self.logger.debug(f"   - {pair}: last update {timestamp.isoformat()}")
+                if inactive_count > 10:
+                    self.logger.debug(f"   ... and {inactive_count - 10} more pairs")
+
+            active = ~missing_time & ~stale
+            df = df[active]
+            ticker_time = ticker_time[active]
+
+            # Create result DataFrame
+            df = pd.DataFrame({
+                'pair': df.index.to_numpy(),
+                'price': df['last'].to_numpy(),
+                'change_24h': df['percentage'].to_numpy(),
+                'volume_24h': df['quoteVolume'].to_numpy(),
+                'timestamp': ticker_time.array  # Exchange time (datetime64, UTC)
+            })
+            df['system_timestamp'] = system_timestamp
 
             # IF NO DATA - RETURN EMPTY DATAFRAME WITH CORRECT COLUMNS
             if df.empty:
@@ -267,30 +353,34 @@ class AsyncExchangeFetcher:
                 return pd.DataFrame(columns=['rank', 'pair', 'price', 'change_24h', 'volume_24h', 'timestamp', 'system_timestamp'])
 
             # Process non-empty DataFrame
-            # Sort by growth percentage (descending)
-            df = df.sort_values('change_24h', ascending=False)
+            # Select top pairs by growth percentage (descending), limited to the requested number
+            if limit:
+                df = df.nlargest(limit, 'change_24h')
+            else:
+                df = df.sort_values('change_24h', ascending=False)
 
             # Add rank
-            df['rank'] = range(1, len(df) + 1)
-
-            # Limit number
-            if limit and len(df) > limit:
-                df = df.head(limit)
+            df['rank'] = np.arange(1, len(df) + 1)
 
             # Format values
-            df['change_24h'] = df['change_24h'].round(3)
-            df['volume_formatted'] = (df['volume_24h'] / 1_000_000).round(2)
+            df['change_24h'] = np.round(df['change_24h'].to_numpy(dtype=np.float64), 3)
+            df['volume_formatted'] = np.round(df['volume_24h'].to_numpy(dtype=np.float64) * 1e-6, 2)
 
             filter_info = f" (filter: {quote_currency})" if quote_currency else ""
             self.logger.debug(f"📊 Retrieved {len(df)} active pairs from {self.exchange_id}{filter_info}")
 
+            # Exchange time as ISO strings only for the returned rows (snapshot storage expects strings)
+            df['timestamp'] = df['timestamp'].map(pd.Timestamp.isoformat)
+
             # Print time information
             if 'timestamp' in df.columns and len(df) > 0:
                 first_time = df['timestamp'].iloc[0]
                 last_time = df['timestamp'].iloc[-1]
                 self.logger.debug(f"⏰ Exchange time in data: from {first_time} to {last_time}")
 
-            return df[['rank', 'pair', 'price', 'change_24h', 'volume_24h', 'timestamp', 'system_timestamp']]
+            # Arrow-backed columns instead of per-cell Python objects (pyarrow ships with streamlit)
+            result = df[['rank', 'pair', 'price', 'change_24h', 'volume_24h', 'timestamp', 'system_timestamp']]
+            return result.convert_dtypes(dtype_backend='pyarrow')
 
         except Exception as e:
             self.logger.error(f"⚠ Error fetching data: {e}")
@@ -311,4 +401,36 @@ class AsyncExchangeFetcher:
             try:
                 await self.session.close()
             except:
-                pass
\ No newline at end of file
+                pass
+
+
+async def fetch_many(exchanges: List[Tuple[str, str]], limit: int = 50, quote_currency: Optional[str] = None,
+                     max_concurrent: int = 8) -> Dict[Tuple[str, str], pd.DataFrame]:
+    """
+    Fetch ranked pairs for several exchanges concurrently
+
+    Args:
+        exchanges: List of (exchange_id, market_type)
+        limit: Maximum number of pairs per exchange
+        quote_currency: Filter by quote currency
+        max_concurrent: Maximum number of exchanges fetched at the same time
+
+    Returns:
+        Dict (exchange_id, market_type) -> DataFrame from fetch_ranked_pairs
+    """
+    logger = perf_logger.get_logger('async_fetcher', 'fetcher')
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def fetch_one(exchange_id: str, market_type: str) -> pd.DataFrame:
+        async with semaphore:
+            try:
+                # Context manager closes exchange and session even on errors
+                async with AsyncExchangeFetcher(exchange_id, market_type) as fetcher:
+                    return await fetcher.fetch_ranked_pairs(limit=limit, quote_currency=quote_currency)
+            except Exception as e:
+                logger.error(f"❌ Error fetching {exchange_id} ({market_type}): {e}")
+                return pd.DataFrame(
+                    columns=['rank', 'pair', 'price', 'change_24h', 'volume_24h', 'timestamp', 'system_timestamp'])
+
+    results = await asyncio.gather(*(fetch_one(exchange_id, market_type) for exchange_id, market_type in exchanges))
+    return dict(zip(exchanges, results))
@@ -3,10 +3,25 @@
 Module for managing and displaying pair colors
 """
 import streamlit as st
-import sqlite3
 import pandas as pd
 from typing import List, Dict
 
+# Dark/light flag for every 12-bit RGB color (high nibble per channel, expanded back to 8 bits as n * 17).
+# Luminance perception formula in fixed point: brightness / 255 < 0.5
+_DARK_LUT = bytes(
+    1 if 299 * ((i >> 8) & 0xF) * 17 + 587 * ((i >> 4) & 0xF) * 17 + 114 * (i & 0xF) * 17 < 127500 else 0
+    for i in range(4096)
+)
+
+
+# Single cache shared by all pages; writers of pair colors call load_pair_colors.clear()
+@st.cache_data(ttl=30)
+def load_pair_colors(_storage, db_mtime: float) -> list:
+    """Non-system (pair, color) rows, cached until the database changes (mtime) or TTL expires"""
+    with _storage.conn_lock:
+        return _storage.get_conn().execute(
+            'SELECT pair, color FROM pair_colors WHERE is_system = 0 ORDER BY pair').fetchall()
+
 
 class ColorManager:
     """Pair colors manager"""
@@ -21,7 +36,7 @@ class ColorManager:
         # Get all pair colors
         colors = self._get_all_colors()
 
-        if not colors:
+        if colors.empty:
             st.info("No pair colors found")
             return
 
@@ -31,7 +46,7 @@ class ColorManager:
         search_term = st.text_input("🔍 Search by pair:", key="color_search")
 
         if search_term:
-            colors = [c for c in colors if search_term.lower() in c[0].lower()]
+            colors = colors[colors['Pair'].str.contains(search_term, case=False, regex=False)]
             st.write(f"Found: {len(colors)} pairs")
 
         # Pagination
@@ -48,43 +63,35 @@ class ColorManager:
             )
             start_idx = (page - 1) * page_size
             end_idx = min(start_idx + page_size, len(colors))
-            current_colors = colors[start_idx:end_idx]
+            current_colors = colors.iloc[start_idx:end_idx]
             st.write(f"Showing pairs {start_idx + 1}-{end_idx} of {len(colors)}")
         else:
             current_colors = colors
 
-        # Create compact view using columns
+        # Create compact grid view
         cols_per_row = 4
-        colors_to_show = current_colors[:limit_per_page] if limit_per_page else current_colors
-
-        for i in range(0, len(colors_to_show), cols_per_row):
-            cols = st.columns(cols_per_row)
-            for j in range(cols_per_row):
-                idx = i + j
-                if idx < len(colors_to_show):
-                    with cols[j]:
-                        pair, color = colors_to_show[idx]
-                        # Compact display
-                        st.markdown(f"""
-                        <div style="
-                            background-color: {color}; 
-                            color: {'white' if self._is_dark_color(color) else 'black'};
-                            padding: 8px;
-                            border-radius: 4px;
-                            margin: 2px;
-                            font-size: 12px;
-                            text-align: center;
-                            border: 1px solid #ddd;
-                        ">
-                        <strong>{pair}</strong><br>
-                        {color}
-                        </div>
-                        """, unsafe_allow_html=True)
+        colors_to_show = list(current_colors.itertuples(index=False, name=None))
+        if limit_per_page:
+            colors_to_show = colors_to_show[:limit_per_page]
+
+        # Render all cards in one grid with a single markdown call
+        cards = ''.join(
+            f'<div style="background-color: {color}; '
+            f'color: {"white" if self._is_dark_color(color) else "black"}; '
+            f'padding: 8px; border-radius: 4px; margin: 2px; font-size: 12px; '
+            f'text-align: center; border: 1px solid #ddd;">'
+            f'<strong>{pair}</strong><br>{color}</div>'
+            for pair, color in colors_to_show
+        )
+        st.markdown(
+            f'<div style="display: grid; grid-template-columns: repeat({cols_per_row}, 1fr); gap: 4px;">'
+            f'{cards}</div>',
+            unsafe_allow_html=True
+        )
 
         # Button to export all colors
         if st.button("📥 Export all colors"):
-            df = pd.DataFrame(colors, columns=['Pair', 'Color'])
-            csv = df.to_csv(index=False)
+            csv = colors.to_csv(index=False)
             st.download_button(
                 label="Download CSV",
                 data=csv,
@@ -92,15 +99,9 @@ class ColorManager:
                 mime="text/csv"
             )
 
-    def _get_all_colors(self) -> List:
+    def _get_all_colors(self) -> pd.DataFrame:
         """Get all pair colors"""
-        conn = sqlite3.connect(self.storage.db_path)
-        cursor = conn.cursor()
-        try:
-            cursor.execute('SELECT pair, color FROM pair_colors WHERE is_system = 0 ORDER BY pair')
-            return cursor.fetchall()
-        finally:
-            conn.close()
+        return pd.DataFrame(load_pair_colors(self.storage, self.storage.get_db_mtime()), columns=['Pair', 'Color'])
 
     def _is_dark_color(self, hex_color: str) -> bool:
         """Determine if color is dark"""
@@ -110,13 +111,14 @@ class ColorManager:
         if len(hex_color) == 3:
             hex_color = ''.join([c * 2 for c in hex_color])
 
+        if len(hex_color) < 6:
+            return False
+
         try:
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-
-            # Luminance perception formula
-            brightness = (0.299 * r + 0.587 * g + 0.114 * b) / 255
-            return brightness < 0.5
-        except:
-            return False
\ No newline at end of file
+            # Parse packed RGB once and split channels with bit shifts
+            value = int(hex_color[:6], 16)
+        except ValueError:
+            return False
+
+        # One lookup by the high nibbles of R, G, B (colors close to the threshold may differ from exact math)
+        return bool(_DARK_LUT[((value >> 12) & 0xF00) | ((value >> 8) & 0xF0) | ((value >> 4) & 0xF)])
\ No newline at end of file
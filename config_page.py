@@ -3,37 +3,309 @@
 Configuration page for parameters
 """
 import streamlit as st
-from data_storage import DataStorage
-from data_collector import DataCollector
-from analytics_engine import AnalyticsEngine
+from color_manager import load_pair_colors
+from data_storage import DataStorage, quote_identifier
 from logger import perf_logger
-import sqlite3
+import time
+import csv
+import itertools
+import io
+import numpy as np
 import pandas as pd
-from typing import List
+from typing import Final, List
+
+# Multi-threaded CSV export when polars is installed
+try:
+    import polars as pl
+except ModuleNotFoundError:
+    pl = None
+
+# Selectable options (display name -> value), built once per process instead of on every rerun
+EXCHANGES: Final = {
+    "Binance": "binance",
+    "MEXC": "mexc",
+    "Bybit": "bybit",
+    "Gate.io": "gate",
+    "KuCoin": "kucoin",
+    "OKX": "okx"
+}
+EXCHANGE_NAMES: Final = tuple(EXCHANGES.keys())
+EXCHANGE_INDEX: Final = {code: i for i, code in enumerate(EXCHANGES.values())}
+
+QUOTE_CURRENCIES: Final = ("BTC", "USDT", "USDC", "ETH", "All pairs")
+QUOTE_CURRENCY_INDEX: Final = {currency: i for i, currency in enumerate(QUOTE_CURRENCIES)}
+
+INTERVAL_OPTIONS: Final = {
+    "1 minute": 60,
+    "5 minutes": 300,
+    "15 minutes": 900,
+}
+INTERVAL_NAMES: Final = tuple(INTERVAL_OPTIONS.keys())
+INTERVAL_INDEX: Final = {value: i for i, value in enumerate(INTERVAL_OPTIONS.values())}
+INTERVAL_DISPLAY: Final = {value: name for name, value in INTERVAL_OPTIONS.items()}
+
+RETENTION_OPTIONS: Final = {
+    "1 hour": 1,
+    "4 hours": 4,
+    "1 day": 24
+}
+RETENTION_NAMES: Final = tuple(RETENTION_OPTIONS.keys())
+RETENTION_INDEX: Final = {value: i for i, value in enumerate(RETENTION_OPTIONS.values())}
+
+MARKET_OPTIONS: Final = ("Spot", "Futures")
+
+# Persisted settings loaded on startup: defaults and value types
+SETTING_DEFAULTS: Final = {
+    "exchange": "binance",
+    "quote_currency": "USDT",
+    "markets": ["spot"],
+    "interval": 60,
+    "retention": 24,
+    "pair_limit": 800,
+    "manual_pairs": []
+}
+
+
+def _as_list(value) -> list:
+    """Setting value as list (only lists are accepted)"""
+    if not isinstance(value, list):
+        raise TypeError(f"Expected list, got {type(value).__name__}")
+    return value
+
+
+SETTING_TYPES: Final = {
+    "exchange": str,
+    "quote_currency": str,
+    "markets": _as_list,
+    "interval": int,
+    "retention": int,
+    "pair_limit": int,
+    "manual_pairs": _as_list
+}
+
+# Quiet period before accumulated manual pair edits are applied (colors/tracks)
+MANUAL_PAIRS_DEBOUNCE_SECONDS: Final = 1.0
+
+LOG_LEVELS: Final = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+LOG_LEVEL_INDEX: Final = {level: i for i, level in enumerate(LOG_LEVELS)}
+
+# Partial reruns of page sections (st.fragment, experimental in older Streamlit; plain call if unavailable)
+_fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None) or (lambda func: func)
+
+
+def _fragment_every(seconds: float):
+    """Fragment that also reruns every `seconds` (plain call, i.e. once per rerun, if unavailable)"""
+    fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+    return fragment(run_every=seconds) if fragment else (lambda func: func)
+
+
+@st.cache_resource
+def _get_storage() -> DataStorage:
+    """Shared DataStorage, created once per process instead of on every rerun"""
+    return DataStorage()
+
+
+@st.cache_resource
+def _get_analytics(_storage: DataStorage):
+    """Shared AnalyticsEngine for the shared storage"""
+    from analytics_engine import AnalyticsEngine
+    return AnalyticsEngine(_storage)
+
+
+@st.cache_data(ttl=60)
+def _settings_snapshot(_storage: DataStorage, db_mtime: float) -> dict:
+    """All settings, cached until the database changes (mtime) or TTL expires"""
+    return _storage.get_all_settings()
+
+
+@st.cache_data(ttl=60)
+def _cached_used_pairs(_storage: DataStorage, exchange: str, market: str, currency) -> list:
+    """Used pairs per (exchange, market, currency), refreshed at most once a minute"""
+    return _storage.get_used_pairs(exchange, market, currency)
+
+
+@st.cache_data(ttl=15)
+def _snapshot_count(_storage: DataStorage, exchange: str, market: str) -> int:
+    """Snapshot count for the status panel, refreshed at most every 15 seconds"""
+    return _storage.get_snapshot_count(exchange, market)
+
+
+@st.cache_data(ttl=30)
+def _search_pair_colors(_storage: DataStorage, search_term: str, db_mtime: float) -> list:
+    """Non-system pair colors whose pair contains search_term (case-insensitive), filtered in SQL"""
+    pattern = '%' + search_term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    with _storage.conn_lock:
+        return _storage.get_conn().execute(
+            "SELECT pair, color FROM pair_colors WHERE is_system = 0 AND pair LIKE ? ESCAPE '\\' ORDER BY pair",
+            (pattern,)).fetchall()
+
+
+@st.cache_data(ttl=30)
+def _color_page_html(_storage: DataStorage, search_term: str, page: int, page_size: int, db_mtime: float) -> str:
+    """Card grid HTML for one page of (optionally searched) pair colors, reused until the page or data changes"""
+    if search_term:
+        colors = _search_pair_colors(_storage, search_term, db_mtime)
+    else:
+        colors = load_pair_colors(_storage, db_mtime)
+    start_idx = (page - 1) * page_size
+    page_colors = colors[start_idx:start_idx + page_size]
+
+    cols_per_row = 4
+    text_colors = _bulk_text_colors([color for _, color in page_colors])
+    cards = ''.join(
+        f'<div style="background-color: {color}; color: {text_color}; '
+        f'padding: 8px; border-radius: 4px; margin: 2px; font-size: 12px; '
+        f'text-align: center; border: 1px solid #ddd; word-break: break-all;">'
+        f'<strong>{pair}</strong><br>{color}</div>'
+        for (pair, color), text_color in zip(page_colors, text_colors)
+    )
+    return (f'<div style="display: grid; grid-template-columns: repeat({cols_per_row}, 1fr); gap: 4px;">'
+            f'{cards}</div>')
+
+
+@st.cache_data(ttl=30)
+def _pair_colors_csv(_storage: DataStorage, db_mtime: float) -> bytes:
+    """CSV export of all non-system pair colors, built only when export is requested"""
+    # Plain csv writer over the cached rows, no DataFrame copy for a 2-column dump
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(['Pair', 'Color'])
+    writer.writerows(load_pair_colors(_storage, db_mtime))
+    return buffer.getvalue().encode('utf-8')
+
+
+def _table_prefix(table_name: str) -> str:
+    """Group prefix of a table name (text before the first underscore)"""
+    return table_name.split('_', 1)[0] if '_' in table_name else 'other'
+
+
+def _bulk_text_colors(hex_colors: List[str]) -> List[str]:
+    """Card text color (white on dark, black on light) for a batch of hex colors in one vectorized pass"""
+    if not hex_colors:
+        return []
+    expanded = []
+    for hex_color in hex_colors:
+        hex_color = hex_color.lstrip('#')
+        if len(hex_color) == 3:
+            hex_color = ''.join(c * 2 for c in hex_color)
+        # Unparseable colors count as light (black text)
+        expanded.append(hex_color[:6] if len(hex_color) >= 6 else 'ffffff')
+    try:
+        rgb = np.frombuffer(bytes.fromhex(''.join(expanded)), dtype=np.uint8).reshape(-1, 3)
+    except ValueError:
+        # Non-hex characters somewhere in the batch: classify colors one by one
+        if len(hex_colors) == 1:
+            return ['black']
+        return [_bulk_text_colors([hex_color])[0] for hex_color in hex_colors]
+    # Perceived luminance (0.299, 0.587, 0.114) below half, scaled to integers
+    is_dark = rgb.astype(np.int32) @ np.array([299, 587, 114], dtype=np.int32) < 127500
+    return np.where(is_dark, 'white', 'black').tolist()
+
+
+def _column_dtype(declared_type: str):
+    """Pandas dtype for a declared SQLite column type (by type affinity), None if it should be inferred"""
+    declared_type = (declared_type or '').upper()
+    if 'INT' in declared_type:
+        return 'Int64'
+    if any(name in declared_type for name in ('CHAR', 'CLOB', 'TEXT')):
+        return 'string'
+    if any(name in declared_type for name in ('REAL', 'FLOA', 'DOUB')):
+        return 'float64'
+    return None
+
+
+def _frame_to_csv(df: pd.DataFrame) -> str:
+    """DataFrame as CSV text, written by polars when available"""
+    if pl is not None:
+        try:
+            return pl.from_pandas(df).write_csv()
+        except (ImportError, TypeError, ValueError):
+            # Mixed-type object columns (or no pyarrow) can't be converted; use pandas below
+            pass
+    return df.to_csv(index=False)
+
+
+def _read_table_rows(conn, query: str, dtypes: dict, params=()) -> pd.DataFrame:
+    """Query rows as a DataFrame built column by column with the declared dtypes (inferred where values don't fit)"""
+    cursor = conn.execute(query, params)
+    names = [description[0] for description in cursor.description]
+    rows = cursor.fetchall()
+    columns = list(zip(*rows)) if rows else [()] * len(names)
+
+    data = {}
+    for name, values in zip(names, columns):
+        try:
+            data[name] = pd.array(list(values), dtype=dtypes.get(name))
+        except (ValueError, TypeError):
+            # SQLite columns are dynamically typed: stored values may not match the declaration
+            data[name] = pd.array(list(values))
+    return pd.DataFrame(data)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _table_schema(_storage: DataStorage, table_name: str, db_mtime: float):
+    """Column info, rowid presence and column dtypes of a table, read together and reused across page clicks"""
+    with _storage.conn_lock:
+        conn = _storage.get_conn()
+        columns = conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})").fetchall()
+        table_sql = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+        ).fetchone()
+    has_rowid = 'WITHOUT ROWID' not in ((table_sql[0] or '') if table_sql else '').upper()
+    dtypes = {col[1]: _column_dtype(col[2]) for col in columns}
+    return columns, has_rowid, dtypes
+
+
+def _invalidate_data_caches():
+    """Drop cached snapshot counts and used pairs after snapshots are deleted"""
+    _snapshot_count.clear()
+    _cached_used_pairs.clear()
+
+
+@st.cache_resource
+def _init_perf_logger(_storage: DataStorage) -> bool:
+    """Initialize logger with DB settings once per process"""
+    perf_logger.initialize_with_storage(_storage)
+    return True
+
+
+@st.cache_resource
+def _get_logger():
+    """Config page logger"""
+    return perf_logger.get_logger('config_page', 'config')
 
 
 class ConfigPage:
     """Configuration page"""
 
     def __init__(self):
-        self.storage = DataStorage()
-        self.analytics = AnalyticsEngine(self.storage)  # Added AnalyticsEngine
+        self.storage = _get_storage()
+        self.analytics = _get_analytics(self.storage)  # Added AnalyticsEngine
+        _init_perf_logger(self.storage)
         self._init_session_state()
         self._load_settings()
-        self.logger = perf_logger.get_logger('config_page', 'config')
+        self.logger = _get_logger()
         self._init_threshold_tracking()
 
+    def _get_settings(self) -> dict:
+        """Get cached snapshot of all settings"""
+        return _settings_snapshot(self.storage, self.storage.get_db_mtime())
+
+    def _get_setting(self, key: str, default=None):
+        """Get setting from the cached snapshot"""
+        return self._get_settings().get(key, default)
+
     def _init_threshold_tracking(self):
         """Initialize tracking of threshold changes"""
         if 'previous_threshold' not in st.session_state:
-            current_threshold = self.storage.get_setting('rank_threshold', 20)
+            current_threshold = self._get_setting('rank_threshold', 20)
             st.session_state.previous_threshold = current_threshold
         if 'threshold_changed' not in st.session_state:
             st.session_state.threshold_changed = False
 
-    def _check_threshold_change(self):
+    def _check_threshold_change(self) -> bool:
         """Check if sensitivity threshold has changed"""
-        current_threshold = self.storage.get_setting('rank_threshold', 20)
+        current_threshold = self._get_setting('rank_threshold', 20)
         previous_threshold = st.session_state.get('previous_threshold', current_threshold)
 
         if current_threshold != previous_threshold:
@@ -43,6 +315,8 @@ class ConfigPage:
         else:
             st.session_state.threshold_changed = False
 
+        return st.session_state.threshold_changed
+
     def _init_session_state(self):
         """Initialize session state with default values"""
         defaults = {
@@ -58,7 +332,9 @@ class ConfigPage:
             "colors_page": 1,
             "tables_page": 1,
             "colors_search": "",
-            "tables_search": ""
+            "tables_search": "",
+            "persisted_settings": {},  # Last values written to / read from the database
+            "manual_pending": None  # Manual pair edits waiting to be applied
         }
 
         for key, default_value in defaults.items():
@@ -71,59 +347,56 @@ class ConfigPage:
             st.session_state.loaded_settings = True
 
             # Load settings from database
-            settings = self.storage.get_all_settings()
-
-            # Ensure settings exist in database
-            for key in ['exchange', 'quote_currency', 'markets', 'interval',
-                        'retention', 'pair_limit', 'manual_pairs']:
-                if key in settings:
-                    value = settings[key]
-                    # Make sure value is correct
-                    if value is not None:
-                        st.session_state[key] = value
-                    else:
-                        # If value is None, use default
-                        default_values = {
-                            "exchange": "binance",
-                            "quote_currency": "USDT",
-                            "markets": ["spot"],
-                            "interval": 60,
-                            "retention": 24,
-                            "pair_limit": 800,
-                            "manual_pairs": []
-                        }
-                        if key in default_values:
-                            st.session_state[key] = default_values[key]
+            settings = self._get_settings()
+            st.session_state.persisted_settings = dict(settings)
+
+            # Normalize loaded settings to their types once, falling back to defaults
+            normalized = {}
+            for key, default_value in SETTING_DEFAULTS.items():
+                if key not in settings:
+                    continue
+                value = settings[key]
+                try:
+                    value = SETTING_TYPES[key](value) if value is not None else default_value
+                except (TypeError, ValueError):
+                    value = default_value
+                st.session_state[key] = value
+                if value != settings[key]:
+                    normalized[key] = value
+
+            # Write back values whose stored form differed
+            if normalized:
+                self._save_settings(normalized)
 
     def _save_setting_on_change(self, key: str, value: any):
-        """Save setting on change"""
+        """Save setting on change (skipped if the value is already persisted)"""
         st.session_state[key] = value
+        if st.session_state.persisted_settings.get(key) == value:
+            return
         self.storage.save_setting(key, value)
+        st.session_state.persisted_settings[key] = value
+        _settings_snapshot.clear()
+
+    def _save_settings(self, settings: dict):
+        """Save several settings in one transaction (explicit actions, always written)"""
+        # No comparison with persisted_settings: another session or the collector may have changed the DB
+        if settings:
+            self.storage.save_settings_bulk(settings)
+            st.session_state.persisted_settings.update(settings)
+            _settings_snapshot.clear()
+
+    def _on_rank_threshold_change(self):
+        """Persist rank threshold once the slider value is changed"""
+        self._save_setting_on_change('rank_threshold', st.session_state.rank_threshold_slider)
 
     def _get_current_interval_seconds(self) -> int:
-        """Get current interval from settings"""
-        try:
-            interval_setting = self.storage.get_setting('interval', 60)
-            current_interval = st.session_state.get("interval", 60)
-            if current_interval != interval_setting:
-                self._save_setting_on_change('interval', current_interval)
-                interval_setting = current_interval
-            if isinstance(interval_setting, str):
-                return int(interval_setting)
-            return interval_setting
-        except Exception as e:
-            self.logger.error(f"Error getting current interval from settings, returning: 1 min: {e}")
-            return 60
+        """Get current interval from settings (normalized to int on load)"""
+        return st.session_state.get("interval", 60)
 
 
     def display(self):
         """Display configuration page"""
 
-        # Ensure logger is initialized with DB settings
-        if not hasattr(perf_logger, '_storage_initialized'):
-            perf_logger.initialize_with_storage(self.storage)
-            perf_logger._storage_initialized = True
-
         st.title("⚙️ Data Collection Configuration")
         st.markdown("---")
 
@@ -133,38 +406,25 @@ class ConfigPage:
 
             with col1:
                 # Exchange selection
-                exchanges = {
-                    "Binance": "binance",
-                    "MEXC": "mexc",
-                    "Bybit": "bybit",
-                    "Gate.io": "gate",
-                    "KuCoin": "kucoin",
-                    "OKX": "okx"
-                }
-
-                exchange_display_names = list(exchanges.keys())
-                exchange_codes = list(exchanges.values())
-
                 current_exchange = st.session_state.get("exchange", "binance")
-                current_index = exchange_codes.index(current_exchange) if current_exchange in exchange_codes else 0
+                current_index = EXCHANGE_INDEX.get(current_exchange, 0)
 
                 selected_exchange_display = st.selectbox(
                     "**Exchange**",
-                    exchange_display_names,
+                    EXCHANGE_NAMES,
                     index=current_index,
                     key="exchange_select"
                 )
-                exchange_code = exchanges[selected_exchange_display]
+                exchange_code = EXCHANGES[selected_exchange_display]
                 st.session_state.exchange = exchange_code
 
                 # Quote currency filter
-                quote_currencies = ["BTC", "USDT", "USDC", "ETH", "All pairs"]
                 current_currency = st.session_state.get("quote_currency", "USDT")
-                currency_index = quote_currencies.index(current_currency) if current_currency in quote_currencies else 1
+                currency_index = QUOTE_CURRENCY_INDEX.get(current_currency, 1)
 
                 selected_currency = st.selectbox(
                     "**Quote Currency**",
-                    quote_currencies,
+                    QUOTE_CURRENCIES,
                     index=currency_index,
                     key="quote_currency_select"
                 )
@@ -172,47 +432,29 @@ class ConfigPage:
 
             with col2:
                 # Request interval
-                interval_options = {
-                    "1 minute": 60,
-                    "5 minutes": 300,
-                    "15 minutes": 900,
-                }
-
-                interval_display_names = list(interval_options.keys())
-                interval_values = list(interval_options.values())
-
                 current_interval = st.session_state.get("interval", 60)
-                current_index = interval_values.index(current_interval) if current_interval in interval_values else 2
+                current_index = INTERVAL_INDEX.get(current_interval, 2)
 
                 selected_interval_display = st.selectbox(
                     "**Request Interval**",
-                    interval_display_names,
+                    INTERVAL_NAMES,
                     index=current_index,
                     key="interval_select"
                 )
-                interval_seconds = interval_options[selected_interval_display]
+                interval_seconds = INTERVAL_OPTIONS[selected_interval_display]
                 st.session_state.interval = interval_seconds
 
                 # Retention period
-                retention_options = {
-                    "1 hour": 1,
-                    "4 hours": 4,
-                    "1 day": 24
-                }
-
-                retention_display_names = list(retention_options.keys())
-                retention_values = list(retention_options.values())
-
                 current_retention = st.session_state.get("retention", 24)
-                current_index = retention_values.index(current_retention) if current_retention in retention_values else 4
+                current_index = RETENTION_INDEX.get(current_retention, 4)
 
                 selected_retention_display = st.selectbox(
                     "**Retention Period**",
-                    retention_display_names,
+                    RETENTION_NAMES,
                     index=current_index,
                     key="retention_select"
                 )
-                retention_hours = retention_options[selected_retention_display]
+                retention_hours = RETENTION_OPTIONS[selected_retention_display]
                 st.session_state.retention = retention_hours
 
         # Second row of settings
@@ -220,14 +462,13 @@ class ConfigPage:
 
         with col1:
             # Market selection
-            market_options = ["Spot", "Futures"]
             current_markets = st.session_state.get("markets", ["spot"])
-            current_markets_display = [m.capitalize() for m in current_markets]
+            current_markets_display = {m.capitalize() for m in current_markets}
 
             selected_markets = st.multiselect(
                 "**Markets**",
-                market_options,
-                default=[m for m in market_options if m in current_markets_display],
+                MARKET_OPTIONS,
+                default=[m for m in MARKET_OPTIONS if m in current_markets_display],
                 key="markets_select"
             )
             markets_lower = [m.lower() for m in selected_markets]
@@ -235,7 +476,8 @@ class ConfigPage:
 
             # Manual pair highlighting
             if exchange_code and markets_lower:
-                available_pairs = self.storage.get_used_pairs(
+                available_pairs = _cached_used_pairs(
+                    self.storage,
                     exchange_code,
                     markets_lower[0] if markets_lower else "spot",
                     selected_currency if selected_currency != "All pairs" else None
@@ -243,10 +485,11 @@ class ConfigPage:
 
                 if available_pairs:
                     current_manual_pairs = st.session_state.get("manual_pairs", [])
+                    pairs_set = set(available_pairs)
                     manual_pairs = st.multiselect(
                         "**Manual Pair Highlighting**",
                         available_pairs,
-                        default=[p for p in current_manual_pairs if p in available_pairs],
+                        default=[p for p in current_manual_pairs if p in pairs_set],
                         help="Select pairs to highlight in tracks regardless of analysis",
                         key="manual_pairs_select"
                     )
@@ -270,38 +513,48 @@ class ConfigPage:
             st.session_state.pair_limit = pair_limit
 
             # Rank sensitivity threshold
-            current_threshold = self.storage.get_setting('rank_threshold', 20)
+            current_threshold = self._get_setting('rank_threshold', 20)
             rank_threshold = st.slider(
                 "**Rank Sensitivity Threshold**",
                 min_value=0,
                 max_value=100,
                 value=current_threshold,
                 step=1,
-                help="Minimum rank change between snapshots to create a track (always 0 for manual pairs)"
+                help="Minimum rank change between snapshots to create a track (always 0 for manual pairs)",
+                key="rank_threshold_slider",
+                on_change=self._on_rank_threshold_change
             )
-            if rank_threshold != current_threshold:
-                self.storage.save_setting('rank_threshold', rank_threshold)
+
+        # Settings as resolved by the widgets above (shared by all save handlers)
+        current_settings = {
+            "exchange": exchange_code,
+            "quote_currency": selected_currency,
+            "markets": markets_lower,
+            "interval": interval_seconds,
+            "retention": retention_hours,
+            "pair_limit": pair_limit,
+            "manual_pairs": st.session_state.get("manual_pairs", []),
+            "rank_threshold": rank_threshold,
+        }
+
+        # Apply queued color/track updates once edits have settled (timer fragment, no widget interaction needed)
+        if st.session_state.get("manual_pending"):
+            self._apply_pending_manual_changes_when_quiet()
 
         st.markdown("---")
 
         col1, col2 = st.columns(2)
         with col1:
-            # Check threshold change and show corresponding button
-            self._check_threshold_change()
-            if st.session_state.threshold_changed:
+            # Check threshold change (once per render) and show corresponding button
+            self._threshold_dirty = self._check_threshold_change()
+            if self._threshold_dirty:
                 st.warning("⚠️ Sensitivity threshold changed! It is recommended to rebuild tracks.")
 
                 # Get current interval
                 current_interval = self._get_current_interval_seconds()
 
                 # Display interval info
-                interval_display = f"{current_interval} sec"
-                if current_interval == 60:
-                    interval_display = "1 minute"
-                elif current_interval == 300:
-                    interval_display = "5 minutes"
-                elif current_interval == 900:
-                    interval_display = "15 minutes"
+                interval_display = INTERVAL_DISPLAY.get(current_interval, f"{current_interval} sec")
 
                 st.info(f"📊 Tracks will be built with snapshot interval: **{interval_display}**")
 
@@ -313,24 +566,13 @@ class ConfigPage:
                     exchange = st.session_state.get("exchange", "binance")
                     markets = st.session_state.get("markets", ["spot"])
 
-                    settings_to_save = {
-                        "exchange": exchange_code,
-                        "quote_currency": selected_currency,
-                        "markets": markets_lower,
-                        "interval": interval_seconds,
-                        "retention": retention_hours,
-                        "pair_limit": pair_limit,
-                        "manual_pairs": st.session_state.get("manual_pairs", []),
-                        'rank_threshold': rank_threshold,
-                    }
-
-                    for key, value in settings_to_save.items():
-                        self.storage.save_setting(key, value)
+                    self._save_settings(current_settings)
 
                     with st.spinner(f"Rebuilding tracks for {exchange} with interval {interval_display}..."):
                         try:
-                            self.analytics.rebuild_all_tracks(exchange, markets, current_interval)
-                            st.success(f"✅ Tracks successfully rebuilt with new threshold and interval {interval_display}!")
+                            total_created = self.analytics.rebuild_all_tracks(exchange, markets, current_interval)
+                            st.success(f"✅ Tracks successfully rebuilt ({total_created}) with new threshold "
+                                       f"and interval {interval_display}!")
                             st.session_state.threshold_changed = False
                         except Exception as e:
                             st.error(f"❌ Error rebuilding tracks: {e}")
@@ -346,20 +588,14 @@ class ConfigPage:
                 current_interval = self._get_current_interval_seconds()
 
                 # Display interval info
-                interval_display = f"{current_interval} sec"
-                if current_interval == 60:
-                    interval_display = "1 minute"
-                elif current_interval == 300:
-                    interval_display = "5 minutes"
-                elif current_interval == 900:
-                    interval_display = "15 minutes"
+                interval_display = INTERVAL_DISPLAY.get(current_interval, f"{current_interval} sec")
 
                 st.info(f"📊 Tracks will be built with snapshot interval: **{interval_display}**")
 
                 with st.spinner(f"Force rebuilding all tracks for {exchange} with interval {interval_display}..."):
                     try:
-                        self.analytics.rebuild_all_tracks(exchange, markets, current_interval)
-                        st.success(f"✅ All tracks successfully rebuilt with interval {interval_display}!")
+                        total_created = self.analytics.rebuild_all_tracks(exchange, markets, current_interval)
+                        st.success(f"✅ All tracks successfully rebuilt ({total_created}) with interval {interval_display}!")
                         st.session_state.threshold_changed = False
                     except Exception as e:
                         st.error(f"❌ Error rebuilding tracks: {e}")
@@ -367,18 +603,8 @@ class ConfigPage:
             # Manual save settings button
             if st.button("💾 Save Current Settings", type="secondary"):
                 # Explicitly save all settings
-                settings_to_save = {
-                    "exchange": exchange_code,
-                    "quote_currency": selected_currency,
-                    "markets": markets_lower,
-                    "interval": interval_seconds,
-                    "retention": retention_hours,
-                    "pair_limit": pair_limit,
-                    "manual_pairs": st.session_state.get("manual_pairs", []),
-                    'rank_threshold': rank_threshold,
-                }
-                for key, value in settings_to_save.items():
-                    self.storage.save_setting(key, value)
+                self._save_settings(current_settings)
+                self._apply_pending_manual_changes(force=True)
 
                 st.success("Settings saved!")
 
@@ -393,9 +619,6 @@ class ConfigPage:
                     help="Will delete all data snapshots but keep settings"
                 )
 
-                # Check threshold change
-                self._check_threshold_change()
-
             with col2:
                 clear_colors = st.checkbox(
                     "**Clear pair colors**",
@@ -411,21 +634,11 @@ class ConfigPage:
         with col1:
             if st.button("🚀 **Start**", type="primary", use_container_width=True):
                 # Save all settings
-                settings_to_save = {
-                    "exchange": exchange_code,
-                    "quote_currency": selected_currency if selected_currency != "All pairs" else None,
-                    "markets": markets_lower,
-                    "interval": interval_seconds,
-                    "retention": retention_hours,
-                    "pair_limit": pair_limit,
-                    "manual_pairs": st.session_state.get("manual_pairs", [])
-                }
-
-                for key, value in settings_to_save.items():
-                    self.storage.save_setting(key, value)
+                self._save_settings(current_settings)
 
                 # Save selected manual highlighting pairs
                 self.storage.save_manual_pairs(st.session_state.get("manual_pairs", []))
+                self._apply_pending_manual_changes(force=True)
 
                 # Clear database if needed
                 if clear_db:
@@ -434,12 +647,14 @@ class ConfigPage:
                         keep_colors=not clear_colors,
                         keep_settings=True
                     )
+                    _invalidate_data_caches()
                     st.success("✅ Database cleared")
 
                 # Save settings to session state
-                st.session_state.config = settings_to_save
+                st.session_state.config = current_settings
 
                 # Start data collection
+                from data_collector import DataCollector
                 collector = DataCollector(self.storage)
                 collector.start(
                     exchange=exchange_code,
@@ -455,19 +670,8 @@ class ConfigPage:
         with col2:
             if st.button("📈 **Tracks**", use_container_width=True):
                 # Save settings
-                settings_to_save = {
-                    "exchange": exchange_code,
-                    "quote_currency": selected_currency if selected_currency != "All pairs" else None,
-                    "markets": markets_lower,
-                    "interval": interval_seconds,
-                    "retention": retention_hours,
-                    "pair_limit": pair_limit,
-                    "manual_pairs": st.session_state.get("manual_pairs", []),
-                    'rank_threshold': rank_threshold,
-                }
-
-                for key, value in settings_to_save.items():
-                    self.storage.save_setting(key, value)
+                self._save_settings(current_settings)
+                self._apply_pending_manual_changes(force=True)
 
                 st.session_state.config = {
                     "exchange": exchange_code,
@@ -490,163 +694,149 @@ class ConfigPage:
                     st.info("Data collection not running")
 
         with col4:
-            # Data collection info
-            markets_for_count = markets_lower if markets_lower else ["spot"]
-            snapshot_count = self.storage.get_snapshot_count(
-                exchange_code,
-                markets_for_count[0]
-            )
-
-            # Check actual collection state
-            is_collecting = False
-            if "collector" in st.session_state:
-                try:
-                    # Check if thread is active
-                    if hasattr(st.session_state.collector, 'is_running'):
-                        is_collecting = st.session_state.collector.is_running
-                    # Additional check for thread state
-                    if hasattr(st.session_state.collector, 'thread'):
-                        if st.session_state.collector.thread:
-                            is_collecting = st.session_state.collector.thread.is_alive()
-                except:
-                    is_collecting = False
-
-            status_color = "🟢" if is_collecting else "⚪"
-            status_text = "Collection active" if is_collecting else "Collection inactive"
-
-            # Get display names
-            exchange_name = selected_exchange_display
-            currency_name = selected_currency
-            interval_name = selected_interval_display
-            retention_name = selected_retention_display
-
-            st.info(f"""
-            **Status:** {status_color} {status_text}
-            - Snapshots in DB: {snapshot_count}
-            - Exchange: {exchange_name}
-            - Quote currency: {currency_name}
-            - Manual highlighting: {len(st.session_state.get('manual_pairs', []))} pairs
-            - Interval: {interval_name}
-            - Retention: {retention_name}
-            """)
+            self._render_status(exchange_code, markets_lower, selected_exchange_display, selected_currency,
+                                selected_interval_display, selected_retention_display)
 
         # Debug information
         with st.expander("🔧 Debug"):
-            # Get current settings
-            current_settings = perf_logger.settings
+            self._render_debug(retention_hours)
+
+    @_fragment
+    def _render_status(self, exchange_code: str, markets_lower: List[str], exchange_name: str,
+                       currency_name: str, interval_name: str, retention_name: str):
+        """Data collection status panel (reruns on its own as a fragment)"""
+        markets_for_count = markets_lower if markets_lower else ["spot"]
+        snapshot_count = _snapshot_count(
+            self.storage,
+            exchange_code,
+            markets_for_count[0]
+        )
 
-            st.subheader("📝 Logging Settings")
-            col1, col2 = st.columns(2)
-            with col1:
+        # Check actual collection state
+        collector = st.session_state.get("collector")
+        is_collecting = bool(collector and collector.is_alive())
+
+        status_color = "🟢" if is_collecting else "⚪"
+        status_text = "Collection active" if is_collecting else "Collection inactive"
+
+        st.info(f"""
+        **Status:** {status_color} {status_text}
+        - Snapshots in DB: {snapshot_count}
+        - Exchange: {exchange_name}
+        - Quote currency: {currency_name}
+        - Manual highlighting: {len(st.session_state.get('manual_pairs', []))} pairs
+        - Interval: {interval_name}
+        - Retention: {retention_name}
+        """)
+
+    @_fragment
+    def _render_debug(self, retention_hours: int):
+        """Debug section: logging settings, DB tools and colors/tables views (reruns on its own as a fragment)"""
+        # Get current settings
+        current_settings = perf_logger.settings
 
-                render_level = st.selectbox(
-                    "Render Level",
-                    ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
-                    index=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"].index(
-                        current_settings.get('render_level', 'INFO')
-                    )
-                )
-                perf_logger.settings['render_level'] = render_level
+        st.subheader("📝 Logging Settings")
+        col1, col2 = st.columns(2)
+        with col1:
 
-                db_level = st.selectbox(
-                    "Database Level",
-                    ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
-                    index=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"].index(
-                        current_settings.get('db_level', 'INFO')
-                    )
-                )
-                perf_logger.settings['db_level'] = db_level
+            render_level = st.selectbox(
+                "Render Level",
+                LOG_LEVELS,
+                index=LOG_LEVEL_INDEX.get(current_settings.get('render_level', 'INFO'), 1)
+            )
+            perf_logger.settings['render_level'] = render_level
 
-                analytics_level = st.selectbox(
-                    "Analytics Level",
-                    ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
-                    index=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"].index(
-                        current_settings.get('analytics_level', 'INFO')
-                    )
-                )
-                perf_logger.settings['analytics_level'] = analytics_level
+            db_level = st.selectbox(
+                "Database Level",
+                LOG_LEVELS,
+                index=LOG_LEVEL_INDEX.get(current_settings.get('db_level', 'INFO'), 1)
+            )
+            perf_logger.settings['db_level'] = db_level
 
-                collector_level = st.selectbox(
-                    "Collector Level",
-                    ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
-                    index=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"].index(
-                        current_settings.get('collector_level', 'INFO')
-                    )
-                )
-                perf_logger.settings['collector_level'] = collector_level
+            analytics_level = st.selectbox(
+                "Analytics Level",
+                LOG_LEVELS,
+                index=LOG_LEVEL_INDEX.get(current_settings.get('analytics_level', 'INFO'), 1)
+            )
+            perf_logger.settings['analytics_level'] = analytics_level
 
-            with col2:
-                config_level = st.selectbox(
-                    "Config Level",
-                    ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
-                    index=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"].index(
-                        current_settings.get('config_level', 'INFO')
-                    )
-                )
-                perf_logger.settings['config_level'] = config_level
+            collector_level = st.selectbox(
+                "Collector Level",
+                LOG_LEVELS,
+                index=LOG_LEVEL_INDEX.get(current_settings.get('collector_level', 'INFO'), 1)
+            )
+            perf_logger.settings['collector_level'] = collector_level
 
-                fetcher_level = st.selectbox(
-                    "Fetcher Level",
-                    ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
-                    index=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"].index(
-                        current_settings.get('fetcher_level', 'INFO')
-                    )
-                )
-                perf_logger.settings['fetcher_level'] = fetcher_level
+        with col2:
+            config_level = st.selectbox(
+                "Config Level",
+                LOG_LEVELS,
+                index=LOG_LEVEL_INDEX.get(current_settings.get('config_level', 'INFO'), 1)
+            )
+            perf_logger.settings['config_level'] = config_level
 
-                performance_log = st.checkbox(
-                    "Performance Logging",
-                    value=current_settings.get('performance_log', True)
-                )
-                perf_logger.settings['performance_log'] = performance_log
+            fetcher_level = st.selectbox(
+                "Fetcher Level",
+                LOG_LEVELS,
+                index=LOG_LEVEL_INDEX.get(current_settings.get('fetcher_level', 'INFO'), 1)
+            )
+            perf_logger.settings['fetcher_level'] = fetcher_level
 
-                if st.button("💾 Save Logging Settings"):
-                    perf_logger.save_settings(self.storage)
-                    st.success("Logging settings saved!")
+            performance_log = st.checkbox(
+                "Performance Logging",
+                value=current_settings.get('performance_log', True)
+            )
+            perf_logger.settings['performance_log'] = performance_log
 
-                if st.button("📊 View Logs", key="view_logs"):
-                    st.session_state.page = "logs"
-                    st.rerun()
+            if st.button("💾 Save Logging Settings"):
+                perf_logger.save_settings(self.storage)
+                st.success("Logging settings saved!")
 
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("Clear Database", key="clear_db_debug"):
-                    self.storage.clear_all_data(keep_colors=True, keep_settings=True)
-                    st.success("Database cleared (settings kept)")
+            if st.button("📊 View Logs", key="view_logs"):
+                self._apply_pending_manual_changes(force=True)
+                st.session_state.page = "logs"
+                st.rerun()
 
-                if st.button("Clear Tracks", key="clear_tracks"):
-                    self.storage.clear_tracks_table()
-                    st.success("Tracks table cleared and recreated")
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("Clear Database", key="clear_db_debug"):
+                self.storage.clear_all_data(keep_colors=True, keep_settings=True)
+                _invalidate_data_caches()
+                st.success("Database cleared (settings kept)")
 
-                if st.button("Check DB", key="check_db"):
-                    self.storage.verify_db_integrity()
-                    st.success("Database checked")
+            if st.button("Clear Tracks", key="clear_tracks"):
+                self.storage.clear_tracks_table()
+                st.success("Tracks table cleared and recreated")
 
-            with col2:
-                if st.button("Clear Old Snapshots"):
-                    self.storage.cleanup_old_data(retention_hours)
-                    st.success(f"Snapshots older than {retention_hours} hours cleared")
+            if st.button("Check DB", key="check_db"):
+                self.storage.verify_db_integrity()
+                st.success("Database checked")
 
-                # Toggle to display colors
-                if st.button("🎨 Show Pair Colors"):
-                    st.session_state.debug_view = 'colors'
-                    st.session_state.colors_page = 1  # Reset to first page
+        with col2:
+            if st.button("Clear Old Snapshots"):
+                self.storage.cleanup_old_data(retention_hours)
+                _invalidate_data_caches()
+                st.success(f"Snapshots older than {retention_hours} hours cleared")
 
-                # Toggle to display tables
-                if st.button("📋 Show DB Tables"):
-                    st.session_state.debug_view = 'tables'
-                    st.session_state.tables_page = 1  # Reset to first page
+            # Toggle to display colors
+            if st.button("🎨 Show Pair Colors"):
+                st.session_state.debug_view = 'colors'
+                st.session_state.colors_page = 1  # Reset to first page
 
+            # Toggle to display tables
+            if st.button("📋 Show DB Tables"):
+                st.session_state.debug_view = 'tables'
+                st.session_state.tables_page = 1  # Reset to first page
 
-            # Display colors or tables based on selection
-            if st.session_state.debug_view == 'colors':
-                self._display_colors_compact()
-            elif st.session_state.debug_view == 'tables':
-                self._display_tables_compact()
 
+        # Display colors or tables based on selection
+        if st.session_state.debug_view == 'colors':
+            self._display_colors_compact()
+        elif st.session_state.debug_view == 'tables':
+            self._display_tables_compact()
 
     def _save_manual_pairs_and_update_colors(self, manual_pairs: List[str]):
-        """Save manual pairs and update colors"""
+        """Save manual pairs and queue color/track updates (applied after a quiet period)"""
         # Get current and new lists
         current_manual_pairs = set(st.session_state.get("manual_pairs", []))
         new_manual_pairs = set(manual_pairs)
@@ -660,6 +850,32 @@ class ConfigPage:
         # Save setting
         self._save_setting_on_change('manual_pairs', manual_pairs)
 
+        # Merge with pending edits, an add followed by a remove (or vice versa) cancels out
+        pending = st.session_state.get("manual_pending") or {"added": set(), "removed": set()}
+        pending_added, pending_removed = pending["added"], pending["removed"]
+        st.session_state.manual_pending = {
+            "added": (pending_added - removed_pairs) | (added_pairs - pending_removed),
+            "removed": (pending_removed - added_pairs) | (removed_pairs - pending_added),
+            "last_edit": time.time()
+        }
+
+    @_fragment_every(MANUAL_PAIRS_DEBOUNCE_SECONDS)
+    def _apply_pending_manual_changes_when_quiet(self):
+        """Timer fragment: applies queued manual pair edits after the debounce period"""
+        self._apply_pending_manual_changes()
+
+    def _apply_pending_manual_changes(self, force: bool = False):
+        """Apply queued manual pair edits once edits have been quiet for the debounce period"""
+        pending = st.session_state.get("manual_pending")
+        if not pending:
+            return
+        if not force and time.time() - pending["last_edit"] < MANUAL_PAIRS_DEBOUNCE_SECONDS:
+            return
+
+        st.session_state.manual_pending = None
+        removed_pairs = pending["removed"]
+        added_pairs = pending["added"]
+
         # Get current settings
         exchange = st.session_state.get("exchange", "binance")
         market_type = st.session_state.get("markets", ["spot"])[0]
@@ -670,8 +886,7 @@ class ConfigPage:
                 from manual_tracks_manager import ManualTracksManager
                 manager = ManualTracksManager(self.storage)
 
-                for pair in removed_pairs:
-                    manager.remove_manual_tracks(pair, exchange, market_type)
+                manager.remove_manual_tracks_bulk(sorted(removed_pairs), exchange, market_type)
 
                 self.logger.info(f"✅ Deleted tracks for {len(removed_pairs)} pairs")
             except Exception as e:
@@ -685,29 +900,31 @@ class ConfigPage:
             if snapshots:
                 latest_table_name, _, _ = snapshots[0]
 
+                # Get or create colors for all added pairs in one batch
+                color_map = self.storage.preload_pair_colors(sorted(added_pairs))
+                updates = [(color_hex, pair) for pair, (_, color_hex) in color_map.items() if color_hex]
+
+                # Update manual_colour in snapshot with a single statement batch
                 updated_count = 0
-                for pair in added_pairs:
-                    try:
-                        # Get or create color
-                        result = self.storage.get_or_create_pair_color(pair)
-
-                        if isinstance(result, tuple) and len(result) == 2:
-                            color_id, color_hex = result
-                            if color_hex:
-                                # Update manual_colour in snapshot
-                                conn = sqlite3.connect(self.storage.db_path)
-                                cursor = conn.cursor()
-                                cursor.execute(f'''
-                                    UPDATE {latest_table_name} 
-                                    SET manual_colour = ? 
-                                    WHERE pair = ?
-                                ''', (color_hex, pair))
-                                conn.commit()
-                                conn.close()
-                                updated_count += 1
-                    except Exception as e:
-                        self.logger.warning(f"Error updating color for {pair}: {e}")
+                if updates:
+                    # Pooled connection (WAL with synchronous=NORMAL), a single commit for the batch
+                    with self.storage.pooled_connection() as conn:
+                        try:
+                            conn.executemany(f'''
+                                UPDATE {quote_identifier(latest_table_name)} 
+                                SET manual_colour = ? 
+                                WHERE pair = ?
+                            ''', updates)
+                            conn.commit()
+                            updated_count = len(updates)
+                        except Exception as e:
+                            self.logger.warning(f"Error updating manual colors: {e}")
+                            conn.rollback()
 
+                load_pair_colors.clear()
+                _search_pair_colors.clear()
+                _color_page_html.clear()
+                _pair_colors_csv.clear()
                 self.logger.info(f"✅ Updated manual colors for {updated_count} pairs")
 
             # Build tracks for new manual pairs
@@ -739,6 +956,7 @@ class ConfigPage:
         except Exception as e:
             self.logger.error(f"Error building tracks for manual pairs: {e}")
 
+    @_fragment
     def _display_colors_compact(self):
         """Compact display of pair colors with state preservation"""
         # Button to hide view
@@ -746,143 +964,94 @@ class ConfigPage:
             st.session_state.debug_view = None
             st.rerun()
 
-        conn = sqlite3.connect(self.storage.db_path)
-        cursor = conn.cursor()
+        db_mtime = self.storage.get_db_mtime()
+        all_colors = load_pair_colors(self.storage, db_mtime)
 
-        try:
-            cursor.execute('SELECT pair, color FROM pair_colors WHERE is_system = 0 ORDER BY pair')
-            all_colors = cursor.fetchall()
+        if not all_colors:
+            st.info("No pair colors found")
+            return
 
-            if not all_colors:
-                st.info("No pair colors found")
-                return
+        st.write(f"Total pair colors: {len(all_colors)}")
 
-            st.write(f"Total pair colors: {len(all_colors)}")
+        # Search by pair
+        search_key = "colors_search_main"
+        if search_key not in st.session_state:
+            st.session_state[search_key] = ""
 
-            # Search by pair
-            search_key = "colors_search_main"
-            if search_key not in st.session_state:
-                st.session_state[search_key] = ""
+        search_term = st.text_input(
+            "🔍 Search by pair:",
+            value=st.session_state[search_key],
+            key="colors_search_input_main"
+        )
+        st.session_state[search_key] = search_term
 
-            search_term = st.text_input(
-                "🔍 Search by pair:",
-                value=st.session_state[search_key],
-                key="colors_search_input_main"
-            )
-            st.session_state[search_key] = search_term
-
-            # Filter by search term
-            filtered_colors = all_colors
-            if search_term:
-                filtered_colors = [c for c in all_colors if search_term.lower() in c[0].lower()]
-                st.write(f"Found: {len(filtered_colors)} pairs")
-
-            # Pagination
-            page_size = 30
-            total_pages = max(1, (len(filtered_colors) + page_size - 1) // page_size)
-
-            # Ensure current page is within limits
-            current_page = st.session_state.colors_page
-            if current_page > total_pages:
-                current_page = total_pages
-                st.session_state.colors_page = current_page
-
-            # Display pagination controls
-            col1, col2, col3 = st.columns([2, 3, 2])
-            with col1:
-                if st.button("⏮️ First", key="colors_first"):
-                    st.session_state.colors_page = 1
-                    st.rerun()
-                if st.button("◀️ Prev", key="colors_prev") and current_page > 1:
-                    st.session_state.colors_page = current_page - 1
-                    st.rerun()
+        # Filter by search term
+        filtered_colors = all_colors
+        if search_term:
+            filtered_colors = _search_pair_colors(self.storage, search_term, db_mtime)
+            st.write(f"Found: {len(filtered_colors)} pairs")
 
-            with col2:
-                page = st.number_input(
-                    "Page:",
-                    min_value=1,
-                    max_value=total_pages,
-                    value=current_page,
-                    key="colors_page_input_main",
-                    on_change=lambda: setattr(st.session_state, 'colors_page',
-                                              st.session_state.colors_page_input_main)
-                )
-                st.session_state.colors_page = page
-
-            with col3:
-                if st.button("Next ▶️", key="colors_next") and current_page < total_pages:
-                    st.session_state.colors_page = current_page + 1
-                    st.rerun()
-                if st.button("Last ⏭️", key="colors_last"):
-                    st.session_state.colors_page = total_pages
-                    st.rerun()
-
-            start_idx = (current_page - 1) * page_size
-            end_idx = min(start_idx + page_size, len(filtered_colors))
-            current_colors = filtered_colors[start_idx:end_idx]
-
-            st.write(f"Showing pairs {start_idx + 1}-{end_idx} of {len(filtered_colors)}")
-
-            # Compact card display
-            cols_per_row = 4
-            for i in range(0, len(current_colors), cols_per_row):
-                cols = st.columns(cols_per_row)
-                for j in range(cols_per_row):
-                    idx = i + j
-                    if idx < len(current_colors):
-                        with cols[j]:
-                            pair, color = current_colors[idx]
-                            text_color = "white" if self._is_dark_color(color) else "black"
-                            st.markdown(f"""
-                                <div style="
-                                    background-color: {color}; 
-                                    color: {text_color};
-                                    padding: 8px;
-                                    border-radius: 4px;
-                                    margin: 2px;
-                                    font-size: 12px;
-                                    text-align: center;
-                                    border: 1px solid #ddd;
-                                    word-break: break-all;
-                                ">
-                                <strong>{pair}</strong><br>
-                                {color}
-                                </div>
-                                """, unsafe_allow_html=True)
-
-            # Export button
-            if st.button("📥 Export All Colors to CSV", key="export_colors"):
-                df = pd.DataFrame(all_colors, columns=['Pair', 'Color'])
-                csv = df.to_csv(index=False, encoding='utf-8')
-                st.download_button(
-                    label="Download CSV",
-                    data=csv,
-                    file_name="pair_colors.csv",
-                    mime="text/csv"
-                )
+        # Pagination
+        page_size = 30
+        total_pages = max(1, (len(filtered_colors) + page_size - 1) // page_size)
 
-        finally:
-            conn.close()
+        # Ensure current page is within limits
+        current_page = st.session_state.colors_page
+        if current_page > total_pages:
+            current_page = total_pages
+            st.session_state.colors_page = current_page
 
-    def _is_dark_color(self, hex_color: str) -> bool:
-        """Determine if color is dark"""
-        if hex_color.startswith('#'):
-            hex_color = hex_color[1:]
+        # Display pagination controls
+        col1, col2, col3 = st.columns([2, 3, 2])
+        with col1:
+            if st.button("⏮️ First", key="colors_first"):
+                st.session_state.colors_page = 1
+                st.rerun()
+            if st.button("◀️ Prev", key="colors_prev") and current_page > 1:
+                st.session_state.colors_page = current_page - 1
+                st.rerun()
 
-        if len(hex_color) == 3:
-            hex_color = ''.join([c*2 for c in hex_color])
+        with col2:
+            page = st.number_input(
+                "Page:",
+                min_value=1,
+                max_value=total_pages,
+                value=current_page,
+                key="colors_page_input_main",
+                on_change=lambda: setattr(st.session_state, 'colors_page',
+                                          st.session_state.colors_page_input_main)
+            )
+            st.session_state.colors_page = page
 
-        try:
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
+        with col3:
+            if st.button("Next ▶️", key="colors_next") and current_page < total_pages:
+                st.session_state.colors_page = current_page + 1
+                st.rerun()
+            if st.button("Last ⏭️", key="colors_last"):
+                st.session_state.colors_page = total_pages
+                st.rerun()
+
+        start_idx = (current_page - 1) * page_size
+        end_idx = min(start_idx + page_size, len(filtered_colors))
 
-            # Luminance perception formula
-            brightness = (0.299 * r + 0.587 * g + 0.114 * b) / 255
-            return brightness < 0.5
-        except:
-            return False
+        st.write(f"Showing pairs {start_idx + 1}-{end_idx} of {len(filtered_colors)}")
+
+        # Compact card display: all cards in one grid with a single markdown call
+        st.markdown(
+            _color_page_html(self.storage, search_term, current_page, page_size, db_mtime),
+            unsafe_allow_html=True
+        )
+
+        # Export button
+        if st.button("📥 Export All Colors to CSV", key="export_colors"):
+            st.download_button(
+                label="Download CSV",
+                data=_pair_colors_csv(self.storage, db_mtime),
+                file_name="pair_colors.csv",
+                mime="text/csv"
+            )
 
+    @_fragment
     def _display_tables_compact(self):
         """Compact display of DB tables"""
         tables = self.storage.get_all_tables()
@@ -921,20 +1090,9 @@ class ConfigPage:
 
         # Use expandable widget
         with st.expander("📋 Show Tables", expanded=False):
-            # Group tables by prefix
-            table_groups = {}
-            for table in current_tables:
-                if '_' in table:
-                    prefix = table.split('_')[0]
-                else:
-                    prefix = 'other'
-
-                if prefix not in table_groups:
-                    table_groups[prefix] = []
-                table_groups[prefix].append(table)
-
-            # Create accordion for each group
-            for prefix, table_list in sorted(table_groups.items()):
+            # Create accordion for each group of tables sharing a prefix
+            for prefix, group in itertools.groupby(sorted(current_tables, key=_table_prefix), key=_table_prefix):
+                table_list = list(group)
                 with st.expander(f"{prefix} ({len(table_list)} tables)", expanded=False):
                     # Split into columns for compactness
                     cols_per_row = 3
@@ -960,12 +1118,10 @@ class ConfigPage:
     def _display_table_content(self, table_name: str):
         """Display table content"""
         try:
-            conn = sqlite3.connect(self.storage.db_path)
+            conn = self.storage.get_conn()
 
-            # Get table info
-            cursor = conn.cursor()
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            columns = cursor.fetchall()
+            # Get table info (schema lookups are cached; only the data page is read per click)
+            columns, has_rowid, dtypes = _table_schema(self.storage, table_name, self.storage.get_db_mtime())
 
             if not columns:
                 st.warning(f"Table {table_name} has no columns")
@@ -989,47 +1145,57 @@ class ConfigPage:
 
             # Show data with pagination
             with st.expander("📈 Table Data", expanded=True):
-                # Row count
-                cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                total_rows = cursor.fetchone()[0]
-                st.write(f"Total rows: {total_rows}")
-
-                # Pagination for data
+                # Keyset pagination by rowid (no COUNT(*) scan, no OFFSET re-scan)
                 rows_per_page = 100
-                total_pages = (total_rows + rows_per_page - 1) // rows_per_page
-
-                if total_pages > 1:
-                    data_page = st.number_input(
-                        "Data page:",
-                        min_value=1,
-                        max_value=total_pages,
-                        value=1,
-                        key=f"data_page_{table_name}"
-                    )
-                    offset = (data_page - 1) * rows_per_page
-                    query = f"SELECT * FROM {table_name} LIMIT {rows_per_page} OFFSET {offset}"
-                    st.write(f"Showing rows {offset+1}-{min(offset+rows_per_page, total_rows)} of {total_rows}")
-                else:
-                    query = f"SELECT * FROM {table_name} LIMIT 5000"
 
-                # Load data
-                df = pd.read_sql_query(query, conn)
+                has_more = False
+                if has_rowid:
+                    # Start rowid of every visited page, so Prev can step back
+                    cursors_key = f"data_cursors_{table_name}"
+                    cursors = st.session_state.setdefault(cursors_key, [0])
+                    quoted_table = quote_identifier(table_name)
+
+                    with self.storage.conn_lock:
+                        df = _read_table_rows(
+                            conn,
+                            f"SELECT rowid AS _page_rowid, * FROM {quoted_table} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                            dtypes, params=(cursors[-1], rows_per_page + 1)
+                        )
+                    has_more = len(df) > rows_per_page
+                    df = df.iloc[:rows_per_page]
+                    next_cursor = int(df['_page_rowid'].iloc[-1]) if has_more else None
+                    df = df.drop(columns='_page_rowid')
+
+                    first_row = (len(cursors) - 1) * rows_per_page
+                    if not df.empty:
+                        st.write(f"Page {len(cursors)}: rows {first_row + 1}-{first_row + len(df)}")
+
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if len(cursors) > 1 and st.button("◀️ Prev", key=f"data_prev_{table_name}"):
+                            cursors.pop()
+                            st.rerun()
+                    with col2:
+                        if has_more and st.button("Next ▶️", key=f"data_next_{table_name}"):
+                            cursors.append(next_cursor)
+                            st.rerun()
+                else:
+                    with self.storage.conn_lock:
+                        df = _read_table_rows(conn, f"SELECT * FROM {quote_identifier(table_name)} LIMIT 5000", dtypes)
 
                 if not df.empty:
                     st.dataframe(df, use_container_width=True, height=400)
 
                     # Export button
-                    csv = df.to_csv(index=False)
+                    csv_data = _frame_to_csv(df)
                     st.download_button(
                         label=f"📥 Download {len(df)} rows",
-                        data=csv,
+                        data=csv_data,
                         file_name=f"{table_name}.csv",
                         mime="text/csv"
                     )
                 else:
                     st.info("Table is empty")
 
-            conn.close()
-
         except Exception as e:
             st.error(f"Error reading table {table_name}: {str(e)}")
\ No newline at end of file
@@ -4,11 +4,11 @@ Simplified data collector for prototype
 """
 import asyncio
 import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Optional
 from async_fetcher import AsyncExchangeFetcher
 from analytics_engine import AnalyticsEngine
 from logger import perf_logger
-import time
 from datetime import datetime, timedelta, timezone
 
 
@@ -20,12 +20,18 @@ class DataCollector:
         self.analytics = AnalyticsEngine(storage)
         self.is_running = False
         self.thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()  # Set by stop() to wake the loop out of its interval wait
+        self._fetcher: Optional[AsyncExchangeFetcher] = None  # Kept open across collections (session, markets)
+        self._analytics_pool: Optional[ThreadPoolExecutor] = None  # Track building off the collection thread
+        self._pending_analytics: Optional[Future] = None
         self.quote_currency: Optional[str] = None
         self.pair_limit: int = 50
         self.retention_hours: int = 24
         self.logger = perf_logger.get_logger('data_collector', 'collector')
         self.last_collection_time = None  # Time of last successful data collection
         self.min_interval_seconds = 30  # Minimum interval between snapshot saves
+        self.cleanup_interval_seconds = 3600  # Minimum interval between retention cleanups
+        self.last_cleanup_time = None  # Time of last retention cleanup
 
     def start(self, exchange: str, market_type: str,
               quote_currency: Optional[str] = None,
@@ -39,6 +45,8 @@ class DataCollector:
             return
 
         self.is_running = True
+        self._stop_event.clear()
+        self._analytics_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analytics")
         self.quote_currency = quote_currency
         self.pair_limit = min(pair_limit, 5000)  # Limit to max 1000 pairs
         self.retention_hours = retention_hours
@@ -48,29 +56,32 @@ class DataCollector:
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
 
-            while self.is_running:
-                try:
-                    # Check if enough time has passed since last collection
-                    current_time = datetime.now(timezone.utc)
-                    if (self.last_collection_time and
-                            (current_time - self.last_collection_time).total_seconds() < self.min_interval_seconds):
-                        self.logger.debug(f"⏸️ Skipping data collection, less than {self.min_interval_seconds} seconds passed")
-                    else:
-                        # Collect data
-                        loop.run_until_complete(
-                            self._collect_data(exchange, market_type)
-                        )
-                        self.last_collection_time = current_time
-
-                    # Wait specified interval
-                    for _ in range(interval_seconds):
-                        if not self.is_running:
+            try:
+                while self.is_running:
+                    try:
+                        # Check if enough time has passed since last collection
+                        current_time = datetime.now(timezone.utc)
+                        if (self.last_collection_time and
+                                (current_time - self.last_collection_time).total_seconds() < self.min_interval_seconds):
+                            self.logger.debug(f"⏸️ Skipping data collection, less than {self.min_interval_seconds} seconds passed")
+                        else:
+                            # Collect data
+                            loop.run_until_complete(
+                                self._collect_data(exchange, market_type)
+                            )
+                            self.last_collection_time = current_time
+
+                        # Wait specified interval (returns early once stop() is called)
+                        if self._stop_event.wait(interval_seconds):
                             break
-                        time.sleep(1)
 
-                except Exception as e:
-                    self.logger.error(f"❌ Error in collection loop: {e}")
-                    time.sleep(30)
+                    except Exception as e:
+                        self.logger.error(f"❌ Error in collection loop: {e}")
+                        self._stop_event.wait(30)
+            finally:
+                # Close the persistent fetcher and the loop on the thread that owns them
+                loop.run_until_complete(self._close_fetcher())
+                loop.close()
 
         # Start in separate thread
         self.thread = threading.Thread(
@@ -86,6 +97,7 @@ class DataCollector:
     def stop(self):
         """Safe stop of data collection"""
         self.is_running = False
+        self._stop_event.set()
 
         if self.thread:
             try:
@@ -98,53 +110,99 @@ class DataCollector:
 
             self.thread = None
 
+        if self._analytics_pool:
+            # Wait for a running track build (queued work is cancelled) so it can't overlap with the next start()
+            self._analytics_pool.shutdown(wait=True, cancel_futures=True)
+            self._analytics_pool = None
+            self._pending_analytics = None
+
         self.logger.info("⏹️ Data collection stopped")
 
+    def is_alive(self) -> bool:
+        """Whether the collection thread is running"""
+        return bool(self.thread and self.thread.is_alive())
+
+    async def _get_fetcher(self, exchange: str, market_type: str) -> AsyncExchangeFetcher:
+        """Persistent fetcher, initialized on first use (recreated on next tick if initialization fails)"""
+        if self._fetcher is None:
+            fetcher = AsyncExchangeFetcher(exchange, market_type)
+            try:
+                await fetcher.initialize()
+            except Exception:
+                await fetcher.close()
+                raise
+            self._fetcher = fetcher
+        return self._fetcher
+
+    async def _close_fetcher(self):
+        """Close the persistent fetcher connections"""
+        if self._fetcher is not None:
+            await self._fetcher.close()
+            self._fetcher = None
+
+    def _build_tracks(self, exchange: str, market_type: str):
+        """Build and save tracks for the latest snapshots (runs on the analytics pool)"""
+        try:
+            self.analytics.build_and_save_two_point_tracks(exchange, market_type, rebuild_all=False)
+        except Exception as e:
+            self.logger.error(f"❌ Error in analyze_trajectories: {e}")
+
     async def _collect_data(self, exchange: str, market_type: str):
         """Collect data once with manual colors update"""
         try:
-            async with AsyncExchangeFetcher(exchange, market_type) as fetcher:
-                df = await fetcher.fetch_ranked_pairs(
-                    limit=self.pair_limit,
-                    quote_currency=self.quote_currency
+            fetcher = await self._get_fetcher(exchange, market_type)
+            df = await fetcher.fetch_ranked_pairs(
+                limit=self.pair_limit,
+                quote_currency=self.quote_currency
+            )
+
+            if not df.empty:
+                # Check if enough time has passed since last save
+                # Check latest snapshot in DB
+                latest_snapshots = self.storage.get_latest_snapshots(exchange, market_type, limit=1)
+
+                if latest_snapshots:
+                    _, latest_time, _ = latest_snapshots[0]
+                    current_time = datetime.now(timezone.utc)
+                    time_diff = (current_time - latest_time).total_seconds()
+
+                    if time_diff < self.min_interval_seconds:
+                        self.logger.debug(f"⏸️ Skipping snapshot save, only {time_diff:.1f} seconds passed")
+                        return
+
+                # Save snapshot
+                table_name = self.storage.save_snapshot(
+                    exchange,
+                    market_type,
+                    df,
+                    period_minutes=5
                 )
 
-                if not df.empty:
-                    # Check if enough time has passed since last save
-                    # Check latest snapshot in DB
-                    latest_snapshots = self.storage.get_latest_snapshots(exchange, market_type, limit=1)
-
-                    if latest_snapshots:
-                        _, latest_time, _ = latest_snapshots[0]
-                        current_time = datetime.now(timezone.utc)
-                        time_diff = (current_time - latest_time).total_seconds()
-
-                        if time_diff < self.min_interval_seconds:
-                            self.logger.debug(f"⏸️ Skipping snapshot save, only {time_diff:.1f} seconds passed")
-                            return
-
-                    # Save snapshot
-                    table_name = self.storage.save_snapshot(
-                        exchange,
-                        market_type,
-                        df,
-                        period_minutes=5
-                    )
-
-                    if table_name:
-                        try:
-                            # Call analysis
-                            self.analytics.build_and_save_two_point_tracks(exchange, market_type, rebuild_all=False)
-                        except Exception as e:
-                            self.logger.error(f"❌ Error in analyze_trajectories: {e}")
-
-                    self.logger.debug(f"📊 Data retrieved: {len(df)} pairs from {exchange}")
-
-                    # Retention period control
-                    self.storage.cleanup_old_data(
+                if table_name:
+                    # Call analysis in background (skipped while the previous build is still running)
+                    analytics_pool = self._analytics_pool  # None once stop() has shut it down
+                    if analytics_pool is None:
+                        pass
+                    elif self._pending_analytics is None or self._pending_analytics.done():
+                        self._pending_analytics = analytics_pool.submit(self._build_tracks, exchange, market_type)
+                    else:
+                        self.logger.debug("⏸️ Previous track build still running, skipping analysis for this snapshot")
+
+                self.logger.debug(f"📊 Data retrieved: {len(df)} pairs from {exchange}")
+
+                # Retention period control (at most once per cleanup interval).
+                # Runs on the analytics pool, after any track build, so it never drops tables a build is reading
+                current_time = datetime.now(timezone.utc)
+                analytics_pool = self._analytics_pool
+                if analytics_pool is not None and (
+                        self.last_cleanup_time is None or
+                        (current_time - self.last_cleanup_time).total_seconds() >= self.cleanup_interval_seconds):
+                    analytics_pool.submit(
+                        self.storage.cleanup_old_data,
                         retention_hours=self.retention_hours,
                         cleanup_colors=False
                     )
+                    self.last_cleanup_time = current_time
 
         except Exception as e:
             self.logger.error(f"❌ Data collection error: {e}")
@@ -2,27 +2,52 @@
 """Data storage module for SQLite database"""
 import sqlite3
 import pandas as pd
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Iterator, Optional, Tuple, Any
+import atexit
+import copy
 import json
+import numpy as np
+import os
+import queue
 import random
+import threading
 from logger import perf_logger
 import time
 
 
+# INSERT ... RETURNING is available from SQLite 3.35
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a table/column name for use in dynamic SQL"""
+    return '"' + name.replace('"', '""') + '"'
+
+
 class DataStorage:
     """Managing data storage in SQLite"""
 
-    def __init__(self, db_path: str = "crypto_data.db"):
+    _palette: Optional[List[str]] = None  # Candidate pair colors (see _color_palette)
+
+    def __init__(self, db_path: str = "crypto_data.db", busy_timeout: float = 5.0):
         self.db_path = db_path
+        self.busy_timeout = busy_timeout  # Seconds a connection waits for another writer's lock
         self.logger = perf_logger.get_logger('data_storage', 'db')
         # Initialize caches
-        self._manual_pairs_cache = None
-        self._manual_pairs_cache_time = 0
-        self._manual_pairs_cache_ttl = 60  # 60 seconds
+        self._kv_cache: Dict[str, Tuple[float, Any]] = {}  # setting_key -> (get_db_mtime() at read, decoded value)
         self._pair_color_cache = {}
         self._pair_color_cache_time = {}
         self._pair_color_cache_ttl = 300  # 300 seconds = 5 minutes
+        self._used_colors: Optional[set] = None  # Colors taken in pair_colors (see _get_used_colors)
+        # Shared long-lived connection (see get_conn)
+        self._conn = None
+        self.conn_lock = threading.RLock()
+        # Pool of idle per-call connections (see _acquire_conn), closed at interpreter exit
+        self._conn_pool: queue.LifoQueue = queue.LifoQueue()
+        self._pooled_conns: List[sqlite3.Connection] = []
+        atexit.register(self.close_connections)
         self.logger.debug(f"✅ Initializing DataStorage: {db_path}")
         start_time = time.time()
         self._init_database()
@@ -33,11 +58,87 @@ class DataStorage:
         else:
             self.logger.debug(f"Database initialization took {elapsed:.3f} sec")
 
+    def open_connection(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        """Open a new connection with the per-connection tuning PRAGMAs applied"""
+        # Larger statement cache: per-table dynamic SQL is reused across many snapshot tables
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout,
+                               check_same_thread=check_same_thread, cached_statements=256)
+        conn.execute('PRAGMA synchronous=NORMAL')  # In WAL mode commits skip the fsync
+        conn.execute('PRAGMA mmap_size=268435456')  # 256 MB memory-mapped I/O
+        conn.execute('PRAGMA cache_size=-65536')  # Up to 64 MB page cache (grows on demand)
+        conn.execute('PRAGMA temp_store=MEMORY')  # Sorts/DISTINCT temp b-trees in memory
+        return conn
+
+    def get_conn(self) -> sqlite3.Connection:
+        """
+        Get the shared long-lived connection.
+        It is used from several threads, so hold conn_lock while using it.
+        """
+        with self.conn_lock:
+            if self._conn is None:
+                # Durable in WAL mode without an fsync on every commit (bulk track saves)
+                self._conn = self.open_connection(check_same_thread=False)
+            return self._conn
+
+    def _acquire_conn(self) -> sqlite3.Connection:
+        """
+        Take an idle pooled connection (or open a new one) for a single method call.
+        Pooled connections keep their page cache and prepared statements between calls.
+        """
+        try:
+            return self._conn_pool.get_nowait()
+        except queue.Empty:
+            conn = self.open_connection(check_same_thread=False)
+            with self.conn_lock:
+                self._pooled_conns.append(conn)
+            return conn
+
+    def _release_conn(self, conn: sqlite3.Connection):
+        """Return a connection taken with _acquire_conn to the pool"""
+        if conn.in_transaction:
+            # Never hand out a connection with a pending write transaction
+            conn.rollback()
+        self._conn_pool.put(conn)
+
+    @contextmanager
+    def pooled_connection(self) -> Iterator[sqlite3.Connection]:
+        """
+        Pooled connection for a block of work (e.g. bulk writes from other modules),
+        so it does not hold conn_lock and block reads on the shared connection.
+        """
+        conn = self._acquire_conn()
+        try:
+            yield conn
+        finally:
+            self._release_conn(conn)
+
+    def close_connections(self):
+        """Close all pooled and shared connections"""
+        with self.conn_lock:
+            for conn in self._pooled_conns:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._pooled_conns.clear()
+            self._conn_pool = queue.LifoQueue()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_db_mtime(self) -> float:
+        """Latest modification time of the database, including its WAL file (cache invalidation key)"""
+        mtimes = [os.path.getmtime(path) for path in (self.db_path, self.db_path + '-wal') if os.path.exists(path)]
+        return max(mtimes, default=0.0)
+
     def _init_database(self):
         """Initialize database structure"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.open_connection()
         cursor = conn.cursor()
 
+        # WAL is persistent for the database file, readers no longer block on writers
+        cursor.execute('PRAGMA journal_mode=WAL')
+
         # Table for storing pair colors (unique color per pair)
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS pair_colors (
@@ -49,8 +150,9 @@ class DataStorage:
             )
         ''')
 
-        # Table for storing all used pairs (for manual selection)
-        cursor.execute('''
+        # Table for storing all used pairs (for manual selection).
+        # WITHOUT ROWID: rows live in the pair primary key B-tree, lookups by pair skip the rowid indirection
+        used_pairs_sql = '''
             CREATE TABLE IF NOT EXISTS used_pairs (
                 pair TEXT PRIMARY KEY,
                 exchange TEXT NOT NULL,
@@ -58,8 +160,28 @@ class DataStorage:
                 quote_currency TEXT,
                 first_seen TIMESTAMP,
                 last_seen TIMESTAMP
-            )
-        ''')
+            ) WITHOUT ROWID
+        '''
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='used_pairs'")
+        existing = cursor.fetchone()
+        if existing and 'WITHOUT ROWID' not in existing[0].upper():
+            # One-time migration of a rowid table (its old indexes are dropped with it and recreated below)
+            try:
+                cursor.execute('BEGIN')
+                cursor.execute('ALTER TABLE used_pairs RENAME TO used_pairs_old')
+                cursor.execute(used_pairs_sql)
+                cursor.execute('''
+                    INSERT INTO used_pairs (pair, exchange, market_type, quote_currency, first_seen, last_seen)
+                    SELECT pair, exchange, market_type, quote_currency, first_seen, last_seen FROM used_pairs_old
+                ''')
+                cursor.execute('DROP TABLE used_pairs_old')
+                conn.commit()
+                self.logger.info("✅ used_pairs migrated to WITHOUT ROWID")
+            except Exception as e:
+                conn.rollback()
+                self.logger.warning(f"⚠ used_pairs migration to WITHOUT ROWID failed: {e}")
+        else:
+            cursor.execute(used_pairs_sql)
 
         # Table for snapshot metadata
         cursor.execute('''
@@ -94,13 +216,23 @@ class DataStorage:
             CREATE INDEX IF NOT EXISTS idx_snapshots_created_at 
             ON snapshots_meta(created_at)
         ''')
+        # Covering indexes: latest snapshots and used pairs are read from the index alone, without a sort step.
+        # They replace the narrower (exchange, market_type) indexes, which are now prefixes of these
+        for old_index in ('idx_snapshots_exchange_market', 'idx_snapshots_meta_exch_mkt_time',
+                          'idx_used_pairs_exchange'):
+            cursor.execute(f'DROP INDEX IF EXISTS {old_index}')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_snapshots_em_ts 
+            ON snapshots_meta(exchange, market_type, exchange_timestamp DESC, table_name, created_at)
+        ''')
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_snapshots_exchange_market 
-            ON snapshots_meta(exchange, market_type)
+            CREATE INDEX IF NOT EXISTS idx_used_pairs_em_pair_qc 
+            ON used_pairs(exchange, market_type, pair, quote_currency)
         ''')
+        # Covering index: non-system colors ordered by pair are read from the index alone
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_used_pairs_exchange 
-            ON used_pairs(exchange, market_type, quote_currency)
+            CREATE INDEX IF NOT EXISTS idx_pair_colors_system_pair_color 
+            ON pair_colors(is_system, pair, color)
         ''')
 
         # Add system colors (black and white)
@@ -124,11 +256,11 @@ class DataStorage:
             'manual_pairs': json.dumps([])
         }
 
-        for key, value in default_settings.items():
-            cursor.execute('''
-                INSERT OR IGNORE INTO user_settings (setting_key, setting_value, last_updated)
-                VALUES (?, ?, ?)
-            ''', (key, value, datetime.now().isoformat()))
+        now = datetime.now().isoformat()
+        cursor.executemany('''
+            INSERT OR IGNORE INTO user_settings (setting_key, setting_value, last_updated)
+            VALUES (?, ?, ?)
+        ''', [(key, value, now) for key, value in default_settings.items()])
 
         conn.commit()
         conn.close()
@@ -141,7 +273,7 @@ class DataStorage:
 
     def _verify_integrity(self):
         """Check database integrity on startup"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.open_connection()
         cursor = conn.cursor()
 
         try:
@@ -188,6 +320,9 @@ class DataStorage:
         start_time = time.time()
         if df.empty:
             return ""
+        # Local system time of this save, formatted once for the table name and ISO fields
+        now = datetime.now()
+        now_iso = now.isoformat()
 
         # Create table name with created_at
         # Use the first created_at from data as a reference
@@ -209,11 +344,11 @@ class DataStorage:
 
         # If exchange time could not be obtained, use system time
         if not created_at_timestamp:
-            created_at_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            created_at_timestamp = now.strftime("%Y%m%d_%H%M%S")
 
         table_name = f"snapshot_{exchange}_{market_type}_{created_at_timestamp}"
 
-        conn = sqlite3.connect(self.db_path)
+        conn = self._acquire_conn()
 
         try:
             # Add color columns if missing
@@ -222,9 +357,6 @@ class DataStorage:
             if 'manual_colour' not in df.columns:
                 df['manual_colour'] = None  # Manual highlighting
 
-            # Save DataFrame to new table
-            df.to_sql(table_name, conn, if_exists='replace', index=False)
-
             # Determine exchange time for the snapshot (average time from data)
             snapshot_exchange_time = None
             if 'timestamp' in df.columns and len(df) > 0:
@@ -238,7 +370,12 @@ class DataStorage:
 
             # If exchange time could not be obtained, use system time
             if not snapshot_exchange_time:
-                snapshot_exchange_time = datetime.now().isoformat()
+                snapshot_exchange_time = now_iso
+
+            # Save DataFrame to new table with multi-row INSERTs (at most 999 bound variables per statement).
+            # to_sql commits on its own, so the rows are written before the metadata that makes the snapshot visible
+            df.to_sql(table_name, conn, if_exists='replace', index=False,
+                      method='multi', chunksize=max(1, 999 // len(df.columns)))
 
             # Add metadata with exchange time
             cursor = conn.cursor()
@@ -251,15 +388,14 @@ class DataStorage:
                   datetime.now(tz=timezone.utc).isoformat(),  # System save time
                   period_minutes, len(df)))
 
-            # Update used_pairs
-            for pair in df['pair'].unique():
-                cursor.execute('''
-                    INSERT OR REPLACE INTO used_pairs 
-                    (pair, exchange, market_type, first_seen, last_seen)
-                    VALUES (?, ?, ?, COALESCE((SELECT first_seen FROM used_pairs WHERE pair=?), ?), ?)
-                ''', (pair, exchange, market_type, pair, datetime.now().isoformat(),
-                      datetime.now().isoformat()))
+            # Update used_pairs (one batch)
+            cursor.executemany('''
+                INSERT OR REPLACE INTO used_pairs 
+                (pair, exchange, market_type, first_seen, last_seen)
+                VALUES (?, ?, ?, COALESCE((SELECT first_seen FROM used_pairs WHERE pair=?), ?), ?)
+            ''', [(pair, exchange, market_type, pair, now_iso, now_iso) for pair in df['pair'].unique().tolist()])
 
+            # Metadata and used_pairs are committed together
             conn.commit()
             self.logger.info(
                 f"💾 Snapshot saved: {table_name} ({len(df)} records, exchange time: {snapshot_exchange_time[:19]})")
@@ -268,7 +404,7 @@ class DataStorage:
             self.logger.error(f"❌ Error saving snapshot: {e}")
             table_name = ""
         finally:
-            conn.close()
+            self._release_conn(conn)
 
         elapsed = time.time() - start_time
         if elapsed > 0.5:
@@ -277,39 +413,58 @@ class DataStorage:
             self.logger.debug(f"save_snapshot took {elapsed:.3f} sec: {table_name}")
         return table_name
 
-    def _generate_unique_color(self) -> str:
-        """Generate unique color (8192 variants)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    @classmethod
+    def _color_palette(cls) -> List[str]:
+        """All 8192 13-bit colors (5-5-3 bits) inside the readable luminance window, built once"""
+        if cls._palette is None:
+            # 2^13 = 8192 colors (13 bits), RGB: 5-5-3 bits (32×32×8) scaled to 8 bits per channel
+            r, g, b = np.meshgrid(np.arange(32), np.arange(32), np.arange(8), indexing='ij')
+            r_8bit = (r * 255 // 31).ravel()
+            g_8bit = (g * 255 // 31).ravel()
+            b_8bit = (b * 255 // 7).ravel()
+
+            # Not too light/dark
+            luminance = 0.299 * (r_8bit / 255) + 0.587 * (g_8bit / 255) + 0.114 * (b_8bit / 255)
+            mask = (luminance > 0.2) & (luminance < 0.9)
+            cls._palette = [f"#{rv:02x}{gv:02x}{bv:02x}"
+                            for rv, gv, bv in zip(r_8bit[mask].tolist(), g_8bit[mask].tolist(), b_8bit[mask].tolist())]
+        return cls._palette
+
+    def _get_used_colors(self) -> set:
+        """Colors already taken in pair_colors, loaded once and kept up to date on inserts"""
+        if self._used_colors is None:
+            conn = self._acquire_conn()
+            try:
+                cursor = conn.execute('SELECT color FROM pair_colors')
+                self._used_colors = {row[0] for row in cursor.fetchall() if row[0]}
+            finally:
+                self._release_conn(conn)
+        return self._used_colors
+
+    def _invalidate_used_colors(self):
+        """Reload used colors on next generation (after pair_colors rows are deleted)"""
+        self._used_colors = None
+
+    def _generate_unique_color(self, used_colors: Optional[set] = None) -> str:
+        """Generate unique color from the precomputed palette
 
+        Args:
+            used_colors: Already taken colors; the cached used-color set if not provided
+        """
         try:
-            # 2^13 = 8192 colors (13 bits)
-            # RGB: 5-5-3 bits (32×32×8 = 8192 combinations)
-            used_colors = set()
-            cursor.execute('SELECT color FROM pair_colors WHERE is_system = 0')
-            for row in cursor.fetchall():
-                if row and row[0]:
-                    used_colors.add(row[0])
-
-            max_attempts = 100
-            for _ in range(max_attempts):
-                # Generate 13-bit color (5-5-3)
-                r = random.randint(0, 31)  # 5 bits (0-31)
-                g = random.randint(0, 31)  # 5 bits (0-31)
-                b = random.randint(0, 7)   # 3 bits (0-7)
-
-                # Scale to 8 bits per channel
-                r_8bit = int(r * 255 / 31)
-                g_8bit = int(g * 255 / 31)
-                b_8bit = int(b * 255 / 7)
-
-                color_hex = f"#{r_8bit:02x}{g_8bit:02x}{b_8bit:02x}"
-
-                # Check uniqueness and not too light/dark
-                if color_hex not in used_colors and color_hex not in ['#000000', '#FFFFFF']:
-                    luminance = 0.299 * (r_8bit / 255) + 0.587 * (g_8bit / 255) + 0.114 * (b_8bit / 255)
-                    if 0.2 < luminance < 0.9:
-                        return color_hex
+            if used_colors is None:
+                used_colors = self._get_used_colors()
+            palette = self._color_palette()
+
+            # Random probes are enough while the palette is sparsely used
+            for _ in range(100):
+                color_hex = random.choice(palette)
+                if color_hex not in used_colors:
+                    return color_hex
+
+            available = [color_hex for color_hex in palette if color_hex not in used_colors]
+            if available:
+                return random.choice(available)
 
             # Fallback
             return f"#{random.randint(0, 0xFFFFFF):06x}"
@@ -317,17 +472,15 @@ class DataStorage:
             self.logger.error(f"Color generation error: {e}")
             # Return random color on error
             return f"#{random.randint(0, 0xFFFFFF):06x}"
-        finally:
-            conn.close()
 
     def update_snapshot_color(self, table_name: str, pair: str, color_id: int):
         """Update pair color in a specific snapshot"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._acquire_conn()
         cursor = conn.cursor()
 
         try:
             cursor.execute(f'''
-                UPDATE {table_name} 
+                UPDATE {quote_identifier(table_name)} 
                 SET colour = ? 
                 WHERE pair = ?
             ''', (color_id, pair))
@@ -336,78 +489,48 @@ class DataStorage:
             self.logger.error(f"❌ Error updating color in snapshot: {e}")
             conn.rollback()
         finally:
-            conn.close()
+            self._release_conn(conn)
 
     def get_used_pairs(self, exchange: str, market_type: str,
                        quote_currency: str = None) -> List[str]:
         """Get list of used pairs for manual selection"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        try:
-            if quote_currency and quote_currency != "All pairs":
-                cursor.execute('''
-                    SELECT DISTINCT pair FROM used_pairs 
-                    WHERE exchange = ? AND market_type = ? 
-                    AND (quote_currency = ? OR quote_currency IS NULL)
-                    ORDER BY pair
-                ''', (exchange, market_type, quote_currency))
-            else:
-                cursor.execute('''
-                    SELECT DISTINCT pair FROM used_pairs 
-                    WHERE exchange = ? AND market_type = ?
-                    ORDER BY pair
-                ''', (exchange, market_type))
+        with self.conn_lock:
+            conn = self.get_conn()
+            cursor = conn.cursor()
 
-            return [row[0] for row in cursor.fetchall()]
-        except Exception as e:
-            self.logger.warning(f"⚠ Error getting pair list: {e}")
-            return []
-        finally:
-            conn.close()
+            try:
+                if quote_currency and quote_currency != "All pairs":
+                    cursor.execute('''
+                        SELECT DISTINCT pair FROM used_pairs 
+                        WHERE exchange = ? AND market_type = ? 
+                        AND (quote_currency = ? OR quote_currency IS NULL)
+                        ORDER BY pair
+                    ''', (exchange, market_type, quote_currency))
+                else:
+                    cursor.execute('''
+                        SELECT DISTINCT pair FROM used_pairs 
+                        WHERE exchange = ? AND market_type = ?
+                        ORDER BY pair
+                    ''', (exchange, market_type))
+
+                return [row[0] for row in cursor.fetchall()]
+            except Exception as e:
+                self.logger.warning(f"⚠ Error getting pair list: {e}")
+                return []
 
     def save_manual_pairs(self, pairs: List[str]):
         """Save selected pairs for manual highlighting"""
         self.save_setting('manual_pairs', json.dumps(pairs))
         self.invalidate_manual_pairs_cache()
 
-    def get_manual_pairs(self) -> List[str]: #cached version
-        """Get list of pairs for manual highlighting with TTL caching"""
-        current_time = time.time()
-
-        # Check cache (TTL = 30 seconds)
-        if (hasattr(self, '_manual_pairs_cache') and
-                hasattr(self, '_manual_pairs_cache_time') and
-                self._manual_pairs_cache is not None and
-                current_time - self._manual_pairs_cache_time < self._manual_pairs_cache_ttl):
-            return self._manual_pairs_cache
-
-        # Read from DB
-        manual_pairs = self.get_setting('manual_pairs', '[]')
-
-        if isinstance(manual_pairs, str):
-            try:
-                result = json.loads(manual_pairs)
-                self._manual_pairs_cache = result
-                self._manual_pairs_cache_time = current_time
-                return result
-            except json.JSONDecodeError:
-                self._manual_pairs_cache = []
-                self._manual_pairs_cache_time = current_time
-                return []
-        elif isinstance(manual_pairs, list):
-            self._manual_pairs_cache = manual_pairs
-            self._manual_pairs_cache_time = current_time
-            return manual_pairs
-        else:
-            self._manual_pairs_cache = []
-            self._manual_pairs_cache_time = current_time
-            return []
+    def get_manual_pairs(self) -> List[str]:
+        """Get list of pairs for manual highlighting (cached by get_setting)"""
+        manual_pairs = self.get_setting('manual_pairs', [])
+        return manual_pairs if isinstance(manual_pairs, list) else []
 
     def invalidate_manual_pairs_cache(self):
         """Invalidate manual pairs cache"""
-        self._manual_pairs_cache = None
-        self._manual_pairs_cache_time = 0
+        self._kv_cache.pop('manual_pairs', None)
 
     def get_latest_snapshots(self, exchange: str, market_type: str,
                              limit: int = 1440) -> List[Tuple[str, datetime, datetime]]:
@@ -418,7 +541,7 @@ class DataStorage:
             List[Tuple[table_name, exchange_timestamp, created_at]]
         """
         start_time = time.time()
-        conn = sqlite3.connect(self.db_path)
+        conn = self._acquire_conn()
 
         try:
             cursor = conn.cursor()
@@ -459,13 +582,13 @@ class DataStorage:
                 return []
             raise
         finally:
-            conn.close()
+            self._release_conn(conn)
 
     def cleanup_old_data(self, retention_hours: int = 24, cleanup_colors: bool = False):
         """
         Clean up old data with retention period control
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self._acquire_conn()
         cursor = conn.cursor()
 
         try:
@@ -473,6 +596,9 @@ class DataStorage:
 
             self.logger.debug(f"🧹 Cleaning data older than {retention_hours} hours (up to {cutoff_time})...")
 
+            # Freed pages are just released, not overwritten with zeros
+            cursor.execute('PRAGMA secure_delete=OFF')
+
             # 1. Delete old tracks by created_at
             cursor.execute('DELETE FROM tracks WHERE created_at < ?', (cutoff_time,))
             tracks_deleted = cursor.rowcount
@@ -488,11 +614,11 @@ class DataStorage:
 
             old_tables = [row[0] for row in cursor.fetchall()]
 
-            # Delete old tables
+            # Delete old tables (all drops share the single transaction committed below)
             deleted_count = 0
             for table in old_tables:
                 try:
-                    cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                    cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(table)}")
                     deleted_count += 1
                 except Exception as e:
                     self.logger.warning(f"⚠ Error deleting table {table}: {e}")
@@ -519,45 +645,48 @@ class DataStorage:
                 self.logger.info(f"🗑️ Cleaned inactive colors")
 
             conn.commit()
+            if cleanup_colors:
+                self._invalidate_used_colors()
 
             if deleted_count > 0:
+                # Fold the dropped tables into the main file and reset the WAL
+                cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
                 self.logger.debug(f"✅ Deleted {deleted_count} old snapshots")
 
         except Exception as e:
             self.logger.error(f"❌ Error cleaning data: {e}")
             conn.rollback()
         finally:
-            conn.close()
+            self._release_conn(conn)
 
     def get_all_tables(self) -> List[str]:
         """Get list of all tables (for debugging)"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._acquire_conn()
         cursor = conn.cursor()
 
         try:
             cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
             return [row[0] for row in cursor.fetchall()]
         finally:
-            conn.close()
+            self._release_conn(conn)
 
     def get_snapshot_count(self, exchange: str, market_type: str) -> int:
         """Get number of snapshots"""
-        conn = sqlite3.connect(self.db_path)
+        with self.conn_lock:
+            conn = self.get_conn()
 
-        try:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT COUNT(*) FROM snapshots_meta 
-                WHERE exchange = ? AND market_type = ?
-            ''', (exchange, market_type))
+            try:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT COUNT(*) FROM snapshots_meta 
+                    WHERE exchange = ? AND market_type = ?
+                ''', (exchange, market_type))
 
-            result = cursor.fetchone()
-            return result[0] if result else 0
+                result = cursor.fetchone()
+                return result[0] if result else 0
 
-        except sqlite3.OperationalError:
-            return 0
-        finally:
-            conn.close()
+            except sqlite3.OperationalError:
+                return 0
 
     def clear_all_data(self, keep_colors: bool = True, keep_settings: bool = True):
         """
@@ -567,7 +696,7 @@ class DataStorage:
             keep_colors: Keep color table
             keep_settings: Keep user settings
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = self._acquire_conn()
         cursor = conn.cursor()
 
         try:
@@ -592,7 +721,7 @@ class DataStorage:
                     if table.startswith('sqlite_'):
                         continue
 
-                    cursor.execute(f"DROP TABLE IF EXISTS {table}")
+                    cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(table)}")
                     deleted_count += 1
                     self.logger.info(f"🗑️ Deleted table: {table}")
                 except Exception as e:
@@ -624,22 +753,26 @@ class DataStorage:
                     ON snapshots_meta(created_at)
                 ''')
                 cursor.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_snapshots_exchange_market 
-                    ON snapshots_meta(exchange, market_type)
+                    CREATE INDEX IF NOT EXISTS idx_snapshots_em_ts 
+                    ON snapshots_meta(exchange, market_type, exchange_timestamp DESC, table_name, created_at)
                 ''')
 
             conn.commit()
+            if not keep_colors:
+                self._invalidate_used_colors()
+            if not keep_settings:
+                self._kv_cache.clear()
             self.logger.info(f"✅ Database cleared. Deleted tables: {deleted_count}")
 
         except Exception as e:
             self.logger.error(f"❌ Error clearing database: {e}")
             conn.rollback()
         finally:
-            conn.close()
+            self._release_conn(conn)
 
     def save_setting(self, key: str, value: Any):
         """Save setting"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._acquire_conn()
         cursor = conn.cursor()
 
         try:
@@ -655,62 +788,133 @@ class DataStorage:
             ''', (key, value_str, datetime.now().isoformat()))
 
             conn.commit()
+            self._kv_cache.pop(key, None)
 
         except Exception as e:
             self.logger.error(f"❌ Error saving setting: {e}")
             conn.rollback()
         finally:
-            conn.close()
+            self._release_conn(conn)
 
-    def get_setting(self, key: str, default: Any = None) -> Any:
-        """Get setting"""
-        conn = sqlite3.connect(self.db_path)
+    def save_settings_bulk(self, settings: Dict[str, Any]):
+        """Save several settings in a single transaction"""
+        if not settings:
+            return
+
+        conn = self._acquire_conn()
         cursor = conn.cursor()
 
         try:
-            cursor.execute('''
-                SELECT setting_value FROM user_settings WHERE setting_key = ?
-            ''', (key,))
+            last_updated = datetime.now().isoformat()
+            rows = [
+                (key, json.dumps(value) if isinstance(value, (list, dict)) else str(value), last_updated)
+                for key, value in settings.items()
+            ]
 
-            result = cursor.fetchone()
-            if result:
-                value = result[0]
-                # Try to decode JSON
-                try:
-                    return json.loads(value)
-                except:
-                    return value
-            return default
+            cursor.executemany('''
+                INSERT OR REPLACE INTO user_settings (setting_key, setting_value, last_updated)
+                VALUES (?, ?, ?)
+            ''', rows)
+
+            conn.commit()
+            for key in settings:
+                self._kv_cache.pop(key, None)
 
         except Exception as e:
-            self.logger.warning(f"⚠ Error getting setting: {e}")
-            return default
+            self.logger.error(f"❌ Error saving settings: {e}")
+            conn.rollback()
         finally:
-            conn.close()
+            self._release_conn(conn)
+
+    def get_setting(self, key: str, default: Any = None) -> Any:
+        """Get setting (decoded values are cached until the database changes, from any connection)"""
+        # Taken before the query: a write racing with the read only makes the entry expire early
+        db_mtime = self.get_db_mtime()
+        cached = self._kv_cache.get(key)
+        if cached is not None and cached[0] == db_mtime:
+            return self._copy_setting(cached[1])
+
+        with self.conn_lock:
+            conn = self.get_conn()
+            cursor = conn.cursor()
+
+            try:
+                cursor.execute('''
+                    SELECT setting_value FROM user_settings WHERE setting_key = ?
+                ''', (key,))
+
+                result = cursor.fetchone()
+                if result:
+                    value = result[0]
+                    # Try to decode JSON
+                    try:
+                        value = json.loads(value)
+                    except:
+                        pass
+                    self._kv_cache[key] = (db_mtime, value)
+                    return self._copy_setting(value)
+                return default
+
+            except Exception as e:
+                self.logger.warning(f"⚠ Error getting setting: {e}")
+                return default
+
+    @staticmethod
+    def _copy_setting(value: Any) -> Any:
+        """Copy of a cached list/dict setting, so callers can't mutate the cached value"""
+        return copy.deepcopy(value) if isinstance(value, (list, dict)) else value
 
     def get_all_settings(self) -> Dict[str, Any]:
         """Get all settings"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.conn_lock:
+            conn = self.get_conn()
+            cursor = conn.cursor()
 
-        try:
-            cursor.execute('SELECT setting_key, setting_value FROM user_settings')
-            results = cursor.fetchall()
+            try:
+                cursor.execute('SELECT setting_key, setting_value FROM user_settings')
+                results = cursor.fetchall()
 
-            settings = {}
-            for key, value in results:
-                try:
-                    settings[key] = json.loads(value)
-                except:
-                    settings[key] = value
+                settings = {}
+                for key, value in results:
+                    try:
+                        settings[key] = json.loads(value)
+                    except:
+                        settings[key] = value
 
-            return settings
+                return settings
 
-        except Exception as e:
-            self.logger.warning(f"⚠ Error getting settings: {e}")
+            except Exception as e:
+                self.logger.warning(f"⚠ Error getting settings: {e}")
+                return {}
+
+    def get_settings(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several settings with a single query (missing keys are omitted)"""
+        if not keys:
             return {}
-        finally:
-            conn.close()
+
+        with self.conn_lock:
+            conn = self.get_conn()
+            cursor = conn.cursor()
+
+            try:
+                placeholders = ','.join('?' * len(keys))
+                cursor.execute(f'''
+                    SELECT setting_key, setting_value FROM user_settings
+                    WHERE setting_key IN ({placeholders})
+                ''', list(keys))
+
+                settings = {}
+                for key, value in cursor.fetchall():
+                    try:
+                        settings[key] = json.loads(value)
+                    except:
+                        settings[key] = value
+
+                return settings
+
+            except Exception as e:
+                self.logger.warning(f"⚠ Error getting settings: {e}")
+                return {}
 
     def get_or_create_pair_color(self, pair: str) -> Tuple[Optional[int], Optional[str]]:
         """Get or create color for a pair with TTL caching"""
@@ -726,7 +930,7 @@ class DataStorage:
             return self._pair_color_cache[pair]
 
         self.logger.debug(f"🔍 Getting color for pair: {pair} from DB")
-        conn = sqlite3.connect(self.db_path)
+        conn = self._acquire_conn()
         cursor = conn.cursor()
 
         try:
@@ -744,16 +948,35 @@ class DataStorage:
                 self._pair_color_cache_time[pair] = current_time
                 return color_id, color_hex
 
-            # Generate new unique color
-            new_color = self._generate_unique_color()
-            self.logger.debug(f"Created new color for {pair}: {new_color}")
-            cursor.execute('''
-                INSERT INTO pair_colors (pair, color) 
-                VALUES (?, ?)
-            ''', (pair, new_color))
-
-            color_id = cursor.lastrowid
+            # Generate new unique color. A color taken by another process since the used-color cache
+            # was loaded violates UNIQUE(color): reload the cache and retry once
+            for attempt in range(2):
+                new_color = self._generate_unique_color()
+                try:
+                    if _SQLITE_HAS_RETURNING:
+                        # Single upsert: a pair inserted concurrently by another thread keeps (and returns) its color
+                        cursor.execute('''
+                            INSERT INTO pair_colors (pair, color) 
+                            VALUES (?, ?)
+                            ON CONFLICT(pair) DO UPDATE SET pair = excluded.pair
+                            RETURNING id, color
+                        ''', (pair, new_color))
+                        color_id, new_color = cursor.fetchone()
+                    else:
+                        cursor.execute('''
+                            INSERT INTO pair_colors (pair, color) 
+                            VALUES (?, ?)
+                        ''', (pair, new_color))
+                        color_id = cursor.lastrowid
+                    break
+                except sqlite3.IntegrityError:
+                    conn.rollback()
+                    if attempt:
+                        raise
+                    self._invalidate_used_colors()
             conn.commit()
+            self._get_used_colors().add(new_color)
+            self.logger.debug(f"Created new color for {pair}: {new_color}")
 
             # Update cache
             if not hasattr(self, '_pair_color_cache'):
@@ -770,7 +993,85 @@ class DataStorage:
             conn.rollback()
             return None, None
         finally:
-            conn.close()
+            self._release_conn(conn)
+
+    def preload_pair_colors(self, pairs: List[str]) -> Dict[str, Tuple[Optional[int], Optional[str]]]:
+        """Get or create colors for many pairs with a single batch of queries
+
+        Returns:
+            Dict[pair, (color_id, color_hex)]
+        """
+        current_time = time.time()
+        result = {}
+        to_query = []
+
+        # Serve what we can from cache
+        for pair in dict.fromkeys(pairs):
+            if (pair in self._pair_color_cache and
+                    current_time - self._pair_color_cache_time[pair] < self._pair_color_cache_ttl):
+                result[pair] = self._pair_color_cache[pair]
+            else:
+                to_query.append(pair)
+
+        if not to_query:
+            return result
+
+        conn = self._acquire_conn()
+        cursor = conn.cursor()
+        chunk_size = 900  # Stay below SQLite variable limit
+
+        def select_colors(batch_pairs: List[str]):
+            found = {}
+            for i in range(0, len(batch_pairs), chunk_size):
+                chunk = batch_pairs[i:i + chunk_size]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(f'''
+                    SELECT pair, id, color FROM pair_colors
+                    WHERE is_system = 0 AND pair IN ({placeholders})
+                ''', chunk)
+                for pair, color_id, color_hex in cursor.fetchall():
+                    found[pair] = (color_id, color_hex)
+            return found
+
+        try:
+            found = select_colors(to_query)
+            missing = [pair for pair in to_query if pair not in found]
+
+            if missing:
+                # Generate colors for all missing pairs against the cached used colors
+                used_colors = self._get_used_colors()
+                new_rows = []
+                for pair in missing:
+                    new_color = self._generate_unique_color(used_colors)
+                    used_colors.add(new_color)
+                    new_rows.append((pair, new_color))
+
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO pair_colors (pair, color)
+                    VALUES (?, ?)
+                ''', new_rows)
+                conn.commit()
+                self.logger.debug(f"Created {len(new_rows)} new pair colors")
+
+                found.update(select_colors(missing))
+
+            for pair, value in found.items():
+                self._pair_color_cache[pair] = value
+                self._pair_color_cache_time[pair] = current_time
+            result.update(found)
+
+        except Exception as e:
+            self.logger.error(f"❌ Error preloading pair colors: {e}")
+            conn.rollback()
+        finally:
+            self._release_conn(conn)
+
+        # Pairs rejected by the batch insert (e.g. color collision) fall back to the single-pair path
+        for pair in to_query:
+            if pair not in result:
+                result[pair] = self.get_or_create_pair_color(pair)
+
+        return result
 
 
     def invalidate_pair_color_cache(self, pair: str = None):
@@ -790,16 +1091,24 @@ class DataStorage:
                 self._pair_color_cache_time.clear()
             self.logger.info("🗑️ Entire color cache invalidated")
 
-    def get_snapshot_data(self, table_name: str) -> pd.DataFrame:
-        """Get data from a snapshot"""
-        conn = sqlite3.connect(self.db_path)
+    def get_snapshot_data(self, table_name: str, columns: Optional[List[str]] = None,
+                          dtype: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+        """Get data from a snapshot
+
+        Args:
+            table_name: Snapshot table name
+            columns: Columns to select (all columns if None)
+            dtype: Column dtypes, skips pandas type inference for these columns
+        """
+        conn = self._acquire_conn()
         try:
             cursor = conn.cursor()
-            cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table_name}'")
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
             if not cursor.fetchone():
                 return pd.DataFrame()
 
-            df = pd.read_sql_query(f"SELECT * FROM {table_name}", conn)
+            column_list = ', '.join(quote_identifier(column) for column in columns) if columns else '*'
+            df = pd.read_sql_query(f"SELECT {column_list} FROM {quote_identifier(table_name)}", conn, dtype=dtype)
 
             # Try to convert timestamp column to datetime if present
             if 'timestamp' in df.columns:
@@ -814,11 +1123,11 @@ class DataStorage:
             self.logger.error(f"⚠ Error reading table {table_name}: {e}")
             return pd.DataFrame()
         finally:
-            conn.close()
+            self._release_conn(conn)
 
     def verify_and_fix_snapshot_colors(self):
         """Check and fix colors in snapshots"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._acquire_conn()
         cursor = conn.cursor()
 
         try:
@@ -832,13 +1141,13 @@ class DataStorage:
 
             for table_name in snapshots:
                 # Check table structure
-                cursor.execute(f"PRAGMA table_info({table_name})")
+                cursor.execute(f"PRAGMA table_info({quote_identifier(table_name)})")
                 columns = [col[1] for col in cursor.fetchall()]
 
                 # Fix colour
                 if 'colour' in columns:
                     cursor.execute(f"""
-                        SELECT DISTINCT colour FROM {table_name} 
+                        SELECT DISTINCT colour FROM {quote_identifier(table_name)} 
                         WHERE colour IS NOT NULL AND colour != ''
                     """)
                     colors = cursor.fetchall()
@@ -851,7 +1160,7 @@ class DataStorage:
                 # Fix manual_colour
                 if 'manual_colour' in columns:
                     cursor.execute(f"""
-                        SELECT DISTINCT manual_colour FROM {table_name} 
+                        SELECT DISTINCT manual_colour FROM {quote_identifier(table_name)} 
                         WHERE manual_colour IS NOT NULL AND manual_colour != ''
                     """)
                     manual_colors = cursor.fetchall()
@@ -868,11 +1177,11 @@ class DataStorage:
             self.logger.error(f"❌ Error checking colors: {e}")
             conn.rollback()
         finally:
-            conn.close()
+            self._release_conn(conn)
 
     def clear_tracks_table(self):
         """Clear tracks table"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._acquire_conn()
         cursor = conn.cursor()
         try:
             cursor.execute('DROP TABLE IF EXISTS tracks')
@@ -885,11 +1194,11 @@ class DataStorage:
             self.logger.error(f"❌ Error clearing tracks table: {e}")
             conn.rollback()
         finally:
-            conn.close()
+            self._release_conn(conn)
 
     def delete_tracks_for_exchange(self, exchange: str, market_type: str):
         """Delete all tracks for specified exchange and market type"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._acquire_conn()
         cursor = conn.cursor()
 
         try:
@@ -907,7 +1216,7 @@ class DataStorage:
             self.logger.error(f"❌ Error deleting tracks: {e}")
             conn.rollback()
         finally:
-            conn.close()
+            self._release_conn(conn)
 
     def _fix_color_value(self, cursor, table_name: str, column: str, value: Any) -> bool:
         """Fix color value in column"""
@@ -923,9 +1232,9 @@ class DataStorage:
                 if color_result:
                     hex_color = color_result[0]
                     cursor.execute(f"""
-                        UPDATE {table_name} 
-                        SET {column} = ? 
-                        WHERE {column} = ?
+                        UPDATE {quote_identifier(table_name)} 
+                        SET {quote_identifier(column)} = ? 
+                        WHERE {quote_identifier(column)} = ?
                     """, (hex_color, value))
                     return True
 
@@ -938,9 +1247,9 @@ class DataStorage:
                     if color_result:
                         hex_color = color_result[0]
                         cursor.execute(f"""
-                            UPDATE {table_name} 
-                            SET {column} = ? 
-                            WHERE {column} = ?
+                            UPDATE {quote_identifier(table_name)} 
+                            SET {quote_identifier(column)} = ? 
+                            WHERE {quote_identifier(column)} = ?
                         """, (hex_color, value))
                         return True
                 except ValueError:
@@ -953,7 +1262,7 @@ class DataStorage:
 
     def create_tracks_table(self):
         """Create tracks table if it does not exist"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._acquire_conn()
         cursor = conn.cursor()
 
         try:
@@ -993,4 +1302,4 @@ class DataStorage:
             self.logger.error(f"❌ Error creating tracks table: {e}")
             conn.rollback()
         finally:
-            conn.close()
\ No newline at end of file
+            self._release_conn(conn)
\ No newline at end of file
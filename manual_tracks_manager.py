@@ -6,7 +6,6 @@ from typing import Dict, List, Optional, Tuple
 from track_builder import TrackBuilder, TrackSegment, TrackPoint
 from data_storage import DataStorage
 from logger import perf_logger
-import sqlite3
 from datetime import datetime, timedelta
 import json
 
@@ -21,22 +20,49 @@ class ManualTracksManager:
 
     def remove_manual_tracks(self, pair: str, exchange: str, market_type: str):
         """Remove tracks of a manual pair (ported from old version)"""
-        conn = sqlite3.connect(self.storage.db_path)
-        cursor = conn.cursor()
-
-        try:
-            cursor.execute('''
-                DELETE FROM tracks 
-                WHERE pair = ? 
-                AND exchange = ? 
-                AND market_type = ?
-                AND json_extract(track_data, '$[0].track_type') = 'manual'
-            ''', (pair, exchange, market_type))
-
-            conn.commit()
-            self.logger.info(f"✅ Removed manual tracks for pair: {pair}")
-        except Exception as e:
-            self.logger.error(f"❌ Error removing tracks for {pair}: {e}")
-            conn.rollback()
-        finally:
-            conn.close()
\ No newline at end of file
+        with self.storage.pooled_connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                cursor.execute('''
+                    DELETE FROM tracks 
+                    WHERE pair = ? 
+                    AND exchange = ? 
+                    AND market_type = ?
+                    AND json_extract(track_data, '$[0].track_type') = 'manual'
+                ''', (pair, exchange, market_type))
+
+                conn.commit()
+                self.logger.info(f"✅ Removed manual tracks for pair: {pair}")
+            except Exception as e:
+                self.logger.error(f"❌ Error removing tracks for {pair}: {e}")
+                conn.rollback()
+
+    def remove_manual_tracks_bulk(self, pairs: List[str], exchange: str, market_type: str):
+        """Remove tracks of several manual pairs with a single DELETE"""
+        if not pairs:
+            return
+
+        chunk_size = 900  # Stay below SQLite variable limit
+
+        with self.storage.pooled_connection() as conn:
+            cursor = conn.cursor()
+
+            try:
+                # All chunks are deleted in one transaction
+                for i in range(0, len(pairs), chunk_size):
+                    chunk = pairs[i:i + chunk_size]
+                    placeholders = ','.join('?' * len(chunk))
+                    cursor.execute(f'''
+                        DELETE FROM tracks 
+                        WHERE pair IN ({placeholders}) 
+                        AND exchange = ? 
+                        AND market_type = ?
+                        AND json_extract(track_data, '$[0].track_type') = 'manual'
+                    ''', (*chunk, exchange, market_type))
+
+                conn.commit()
+                self.logger.info(f"✅ Removed manual tracks for {len(pairs)} pairs")
+            except Exception as e:
+                self.logger.error(f"❌ Error removing tracks for {len(pairs)} pairs: {e}")
+                conn.rollback()
\ No newline at end of file
@@ -55,16 +55,14 @@ class TrackBuilder:
                           exchange: str, market_type: str):
         """
         Save tracks to the database (without uniqueness check)
+        All tracks are written with one executemany in a single transaction
         datetime.now(tz=timezone.utc).isoformat()
         """
-        conn = sqlite3.connect(self.storage.db_path)
-        cursor = conn.cursor()
-
         try:
             # Current UTC time for created_at and updated_at
             current_utc_time = datetime.now(tz=timezone.utc).isoformat()
-            # Save tracks
-            saved_count = 0
+            # Collect rows for a single batch insert
+            rows = []
             for pair, track_list in tracks.items():
                 if not track_list:
                     continue
@@ -97,26 +95,29 @@ class TrackBuilder:
 
                     track_data_json = json.dumps(track_dict)
 
-                    # Insert track WITHOUT uniqueness check
-                    cursor.execute('''
+                    rows.append((pair, exchange, market_type, track_data_json,
+                                 track.last_highlighted_time.isoformat() if track.last_highlighted_time else None,
+                                 current_utc_time, current_utc_time))
+
+            # Pooled connection: a long bulk write must not hold conn_lock, which guards UI reads
+            with self.storage.pooled_connection() as conn:
+                try:
+                    # Insert tracks WITHOUT uniqueness check
+                    conn.executemany('''
                         INSERT INTO tracks 
                          (pair, exchange, market_type, track_data, last_highlighted_time, created_at, updated_at)
                         VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (pair, exchange, market_type, track_data_json,
-                          track.last_highlighted_time.isoformat() if track.last_highlighted_time else None,
-                          current_utc_time, current_utc_time))
-
-                    saved_count += 1
+                    ''', rows)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
 
-            conn.commit()
-            self.logger.debug(f"✅ Saved {saved_count} tracks to DB for {exchange}/{market_type}")
+            self.logger.debug(f"✅ Saved {len(rows)} tracks to DB for {exchange}/{market_type}")
 
         except Exception as e:
             self.logger.error(f"❌ Error saving tracks: {e}")
-            conn.rollback()
             raise
-        finally:
-            conn.close()
 
     def load_tracks_from_db(self, exchange: str, market_type: str,
                             pair: str = None,
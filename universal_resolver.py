@@ -4,9 +4,16 @@ Universal DNS resolver for all platforms
 """
 import socket
 import asyncio
+import weakref
 from typing import List, Dict, Any
 import aiohttp
 
+# Cap on concurrent connections/requests per host
+MAX_REQUESTS_PER_HOST = 64
+
+# One request semaphore per event loop (asyncio primitives are bound to their loop)
+_request_semaphores = weakref.WeakKeyDictionary()
+
 
 class UniversalDNSResolver(aiohttp.resolver.AbstractResolver):
     """Cross-platform DNS resolver for Windows and other OS"""
@@ -48,16 +55,27 @@ class UniversalDNSResolver(aiohttp.resolver.AbstractResolver):
         pass
 
 
-def create_aiohttp_session():
+def get_request_semaphore() -> asyncio.Semaphore:
+    """Get the semaphore limiting concurrent exchange requests in the running event loop"""
+    loop = asyncio.get_running_loop()
+    semaphore = _request_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(MAX_REQUESTS_PER_HOST)
+        _request_semaphores[loop] = semaphore
+    return semaphore
+
+
+def create_aiohttp_session(limit_per_host: int = MAX_REQUESTS_PER_HOST):
     """Create an aiohttp session with a universal resolver"""
     resolver = UniversalDNSResolver()
 
     connector = aiohttp.TCPConnector(
         resolver=resolver,
+        limit=1024,
         use_dns_cache=True,
         ttl_dns_cache=300,
         family=socket.AF_INET,
-        limit_per_host=5
+        limit_per_host=limit_per_host
     )
 
     return aiohttp.ClientSession(